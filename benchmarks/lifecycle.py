@@ -0,0 +1,115 @@
+"""
+Run the whole life of a tournament (players, rounds, results, reload) on a
+storage engine and print the time spent in each step.
+
+    python -m benchmarks.lifecycle --storage memory --players 64 --rounds 6
+    python -m benchmarks.lifecycle --storage json --durability batch
+    python -m benchmarks.lifecycle --players 1000 --pairing matching
+
+File engines work in a temporary directory unless --data-dir is given, so
+the data directory of the application is never modified.
+"""
+import argparse
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from models.base_model import _BaseModel
+from models.pairing import Pairing
+from models.player import Player
+from models.storage import STORAGE_ENGINES, DURABILITY_POLICIES, \
+    create_storage
+from models.tournament import Tournament
+
+
+@contextmanager
+def timer(timings, step):
+    start = time.perf_counter()
+    yield
+    timings[step] = timings.get(step, 0.0) + time.perf_counter() - start
+
+
+def play_round(tournament, rng):
+    """ Start the current round and give a random result to every match. """
+    round_key = tournament.check_current_round()
+    tournament.start_new_round()
+    for match in tournament.rounds[round_key].matches:
+        result = rng.choice(['WIN_LEFT', 'WIN_RIGHT', 'DRAW'])
+        if result == 'DRAW':
+            match.draw()
+        else:
+            match.id_win(match.players[0 if result == 'WIN_LEFT' else 1])
+    return round_key
+
+
+def run_lifecycle(players_number, rounds_number, seed=0,
+                  pairing_method=Pairing.CIRCLE, time_budget=None):
+    """
+    Create players and a tournament on the selected storage engine and play
+    every round.
+    :return: {'<step>': <seconds>}
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    timings = {}
+    with timer(timings, 'create players'):
+        players = [Player(f"last_{i}", f"first_{i}", "2000-01-01",
+                          f"AA{i:05d}") for i in range(players_number)]
+    with timer(timings, 'create tournament'):
+        tournament = Tournament("Benchmark", "Paris", "2024-01-01",
+                                "2024-01-02", rounds_number=rounds_number,
+                                pairing_method=pairing_method)
+        for player in players:
+            tournament.add_participant(player.software_id)
+        tournament.initialize_first_round()
+    for _ in range(rounds_number):
+        with timer(timings, 'enter results'):
+            round_key = play_round(tournament, rng)
+        with timer(timings, 'complete rounds'):
+            tournament.complete_round(round_key)
+        if not tournament.complete:
+            with timer(timings, 'pair rounds'):
+                tournament.create_next_round(time_budget)
+    with timer(timings, 'reload tournament'):
+        _BaseModel.reset_cache()
+        Tournament.from_json(tournament.software_id)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--storage', choices=STORAGE_ENGINES,
+                        default='memory')
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--durability', choices=DURABILITY_POLICIES)
+    parser.add_argument('--players', type=int, default=64)
+    parser.add_argument('--rounds', type=int, default=6)
+    parser.add_argument('--pairing', choices=Pairing.METHODS,
+                        default=Pairing.CIRCLE)
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="seconds given to each search of a pairing")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        storage = create_storage(arguments.storage,
+                                 arguments.data_dir or temporary_dir,
+                                 arguments.durability)
+        _BaseModel.use_storage(storage)
+        timings = run_lifecycle(arguments.players, arguments.rounds,
+                                pairing_method=arguments.pairing,
+                                time_budget=arguments.time_budget)
+        if hasattr(storage, 'close'):
+            storage.close()
+
+    print(f"{arguments.storage} storage"
+          f" ({arguments.durability or 'default'} durability),"
+          f" {arguments.players} players, {arguments.rounds} rounds,"
+          f" {arguments.pairing} pairing")
+    for step, seconds in timings.items():
+        print(f"  {step:<20} {seconds * 1000:10.1f} ms")
+    print(f"  {'total':<20} {sum(timings.values()) * 1000:10.1f} ms")
+    print(f"  storage: {storage.stats}")
+
+
+if __name__ == '__main__':
+    main()
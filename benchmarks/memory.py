@@ -0,0 +1,73 @@
+"""
+Measure with tracemalloc the memory used by the instances of the models,
+as in a season archive kept in memory.
+
+    python -m benchmarks.memory --matches 100000
+
+Instances are built from records, as when they are read from the
+database, and are never saved.
+"""
+import argparse
+import tracemalloc
+from models.base_model import _BaseModel
+from models.match import Match
+from models.player import Player
+from models.round import Round
+from models.storage import MemoryStorage
+
+
+def measure(build, count):
+    """
+    :param build: function creating one instance from its number
+    :return: (total bytes, bytes per instance) kept by the instances
+    """
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    instances = [build(number) for number in range(1, count + 1)]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in end.compare_to(start, 'filename'))
+    del instances
+    return size, size / count
+
+
+def build_player(number):
+    record = {"last_name": f"Last_{number}", "first_name": f"First_{number}",
+              "date_of_birth": "2000-01-01", "chess_id": f"AA{number:05d}"}
+    return Player._create_instance_from_json(record, f"p_{number}")
+
+
+def build_match(number, players=1000):
+    # players of a season play many matches, one third of draws, one third
+    # of wins of each player
+    scores = [(0.5, 0.5), (1.0, 0.0), (0.0, 1.0)][number % 3]
+    record = {f"p_{number % players + 1}": scores[0],
+              f"p_{(number * 7 + 1) % players + 1}": scores[1],
+              "complete": True}
+    return Match._create_instance_from_json(record, f"m_{number}")
+
+
+def build_round(number):
+    record = {"name": f"Round_{number}", "time_start": None,
+              "time_end": None, "complete": True,
+              "matches": [f"m_{number}"]}
+    return Round._create_instance_from_json(record, f"r_{number}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--players', type=int, default=10000)
+    parser.add_argument('--matches', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=10000)
+    arguments = parser.parse_args()
+    _BaseModel.use_storage(MemoryStorage())
+    for name, build, count in (('players', build_player, arguments.players),
+                               ('matches', build_match, arguments.matches),
+                               ('rounds', build_round, arguments.rounds)):
+        size, per_instance = measure(build, count)
+        print(f"  {count:>8} {name:<8} {size / 1024 / 1024:8.1f} MiB"
+              f" {per_instance:8.0f} bytes each")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ from controllers.controller_table_player import ControllerTablePlayer
 from controllers.controller_table_tournament import ControllerTableTournament
 from controllers.controller_form import ControllerForm
 from controllers.controller_tournament import ControllerTournament
+from models.base_model import _BaseModel
 
 
 class ControllerMenu:
@@ -26,6 +27,8 @@ class ControllerMenu:
         menu and handles the selected action until 'EXIT' is chosen. Actions
         include creating a new tournament, viewing tournaments, creating a
         new player, viewing players, or loading a specific tournament.
+        Writes delayed by the storage engine are flushed when a screen is
+        left.
         """
         memory = None
         while True:
@@ -47,6 +50,9 @@ class ControllerMenu:
                     self.handle_load_tournament(action[1])
                 case _:
                     continue
+            # a screen has been left, delayed writes are persisted
+            _BaseModel.flush()
+        _BaseModel.flush()
 
     def get_next_action(self, memory):
         """
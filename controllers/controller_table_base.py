@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ControllerTableBase(ABC):
+    """
+    Abstract class that implement the paging of the tables of players and
+    tournaments.
+    Only the page shown by the view, PAGE_SIZE rows, is read from the
+    database. Sorted by ID, a page is read with a cursor; for any other
+    sort, the sort key of every record is computed once, only the sorted
+    IDs are kept and the records of a page are read from them.
+
+    Attribute to be defined in child classes:
+        table_view: the ViewTableBase displaying the rows.
+    """
+    PAGE_SIZE = 200
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.count = 0
+        self.page = 0
+        self.pad_height = None
+        self.sorted_ids: Optional[List[str]] = None
+        self.sorted_content = None
+        self.table_view = None
+
+    @abstractmethod
+    def count_records(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_records(self, offset: int, limit: Optional[int]
+                     ) -> Iterable[Tuple[str, dict]]:
+        """ Records of the table in the order of their IDs. """
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_records_of(self, software_ids: List[str]) -> Dict[str, dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_row(self, software_id: str, record: dict) -> dict:
+        """ Row of the view, with the fields of SORTS_FIELDS. """
+        raise NotImplementedError
+
+    def initialize_pages(self):
+        """
+        Count the records and read the first page, sorted by ID. The view
+        must be created with self.pad_height lines.
+        """
+        self.count = self.count_records()
+        self.pad_height = max(1, min(self.count, self.PAGE_SIZE))
+        self.sorted_content = []
+        self.sort_data(['id'])
+
+    def load_page(self, page: int):
+        """ Read the rows of a page in self.sorted_content. """
+        offset = page * self.PAGE_SIZE
+        if self.sorted_ids is None:
+            records = self.read_records(offset, self.PAGE_SIZE)
+        else:
+            page_ids = self.sorted_ids[offset:offset + self.PAGE_SIZE]
+            found = self.read_records_of(page_ids)
+            records = [(software_id, found[software_id])
+                       for software_id in page_ids if software_id in found]
+        self.page = page
+        self.sorted_content = [self.create_row(software_id, record)
+                               for software_id, record in records]
+
+    def fill_view(self):
+        """ Display the current page and tell the view if others exist. """
+        self.table_view.set_pages(
+            self.page > 0, (self.page + 1) * self.PAGE_SIZE < self.count)
+        self.table_view.fill_pad(self.sorted_content)
+
+    def sort_data(self, sort_fields):
+        """
+        Sorts the data based on the specified fields and shows the first
+        page.
+        """
+        if sort_fields == ['id']:
+            self.sorted_ids = None
+        else:
+            keys = []
+            for software_id, record in self.read_records(0, None):
+                row = self.create_row(software_id, record)
+                keys.append((tuple(row[field] for field in sort_fields),
+                             software_id))
+            keys.sort()
+            self.sorted_ids = [software_id for _, software_id in keys]
+        self.load_page(0)
@@ -1,73 +1,64 @@
+from controllers.controller_table_base import ControllerTableBase
 from views.view_table_players import ViewTablePlayers
 from models.player import Player
+from models.software_id import SoftwareId
 
 
-class ControllerTablePlayer:
+class ControllerTablePlayer(ControllerTableBase):
     """
     Controller class responsible for managing and displaying the table of
     players.
     It interacts with the player data from the database and uses
-    ViewTablePlayer to display the data.
+    ViewTablePlayer to display the data, one page at a time.
     """
     def __init__(self, stdscr):
-        self.stdscr = stdscr
-        self.data = None
-        self.pad_height = None
-        self.sorted_content = None
-        self.player_table_view = None
+        super().__init__(stdscr)
 
     def start(self):
         """
         Starts the player table view. It continuously listens for user input
-        to either return to the main menu or sort the data.
+        to either return to the main menu, sort the data or change page.
         """
         self.update_from_database()
-        self.player_table_view.initialize('List of Players')
+        self.table_view.initialize('List of Players')
         while True:
-            self.player_table_view.fill_pad(self.sorted_content)
-            action = self.player_table_view.start_view()
+            self.fill_view()
+            action = self.table_view.start_view()
 
             match action:
                 case 'BACK':
                     return None
                 case ('SORT', _):
                     self.sort_data(action[1])
+                case ('PAGE', _):
+                    self.load_page(self.page + action[1])
                 case _:
                     continue
 
     def update_from_database(self):
         """
-        Fetches player data from the database and initializes the table view
-        with the updated data. The player data is sorted by the default field
+        Fetches the first page of players from the database and initializes
+        the table view. The player data is sorted by the default field
         ('id') initially.
         """
-        self.data = Player.get_data()['players']
-        self.pad_height = len(self.data)
-        self.sorted_content = []
-        self.sort_data(['id'])
-        self.player_table_view = ViewTablePlayers(self.stdscr, self.pad_height)
+        self.initialize_pages()
+        self.table_view = ViewTablePlayers(self.stdscr, self.pad_height)
 
-    @staticmethod
-    def sort_key(list_of_dict, sort_fields):
-        """ Sorts a list of dictionaries based on the specified fields. """
-        return sorted(list_of_dict,
-                      key=lambda x: tuple([x[field] for field in sort_fields]))
+    def count_records(self):
+        return Player.count_records()
 
-    def sort_data(self, sort_fields):
-        """
-        Sorts the player data based on the specified fields and updates
-        the sorted_content attribute.
-        """
-        data_list = []
-        for key, value in self.data.items():
-            id_num = int(key.split('_')[1])
-            date_of_birth_list = value['date_of_birth'].split('-')
-            date_of_birth_num = int(''.join(date_of_birth_list))
-            data_list.append({
-                'id': id_num,
-                'last_name': value['last_name'].capitalize(),
-                'first_name': value['first_name'].capitalize(),
-                'date_of_birth': date_of_birth_num,
-                'chess_id': value['chess_id'],
-            })
-        self.sorted_content = self.sort_key(data_list, sort_fields)
+    def read_records(self, offset, limit):
+        return Player.cursor(offset, limit)
+
+    def read_records_of(self, software_ids):
+        return Player.get_records(software_ids)
+
+    def create_row(self, software_id, record):
+        date_of_birth_list = record['date_of_birth'].split('-')
+        return {
+            'id': SoftwareId.parse(software_id).number,
+            'last_name': record['last_name'].capitalize(),
+            'first_name': record['first_name'].capitalize(),
+            'date_of_birth': int(''.join(date_of_birth_list)),
+            'chess_id': record['chess_id'],
+        }
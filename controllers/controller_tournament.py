@@ -1,5 +1,6 @@
 from models.tournament import Tournament
 from models.player import Player
+from models.software_id import SoftwareId
 from views.view_tournament import ViewTournament
 
 
@@ -13,7 +14,11 @@ class ControllerTournament:
     def __init__(self, stdscr, software_id):
         self.stdscr = stdscr
         self.tournament = Tournament.from_json(software_id)
-        self.players = Player.get_data()['players']
+        # names displayed for each player ID, filled on demand, and round
+        # datas already prepared for the view, by round ID
+        self.player_names = {}
+        self.load_player_names(self.tournament.participants)
+        self.round_views = {}
         self.view_tournament = ViewTournament(stdscr)
         self.name_score = self.sort_key(self.reformat_name_score(),
                                         ['score', 'last_name', 'first_name'])
@@ -153,7 +158,7 @@ class ControllerTournament:
                     if selected_match is None:
                         continue
                     self.start_match(selected_match)
-                    round_data = self.prepare_round(selected_round)
+                    self.refresh_match_row(round_data, selected_match)
                 case 'ROUND_COMPLETE':
                     try:
                         self.tournament.complete_round(selected_round.name)
@@ -195,17 +200,11 @@ class ControllerTournament:
 
     def check_match_id(self, match_id, current_round_key):
         """ Verify if a match exist in the current tournament. """
-        for match in self.tournament.rounds[current_round_key].matches:
-            if match.software_id == match_id:
-                return match
-        return
+        return self.tournament.rounds[current_round_key].get_match(match_id)
 
     def check_round_id(self, round_id):
         """ Verify if a specific round exist in the current tournament. """
-        for value in self.tournament.rounds.values():
-            if value is not None and round_id == value.software_id:
-                return value
-        return
+        return self.tournament.get_round(round_id)
 
     def check_if_tournament_started(self):
         """ Verify if the tournament has already started. """
@@ -214,44 +213,71 @@ class ControllerTournament:
                 self.tournament_started = True
                 break
 
+    def load_player_names(self, player_ids):
+        """
+        Add the names of several players to self.player_names, the missing
+        ones are read from the database at once.
+        """
+        missing = [player_id for player_id in player_ids
+                   if player_id not in self.player_names]
+        for player in Player.from_json_many(missing):
+            self.player_names[player.software_id] = {
+                'last_name': player.last_name,
+                'first_name': player.first_name}
+
+    def get_player_name(self, player_id):
+        """
+        Name of a player from self.player_names, read from the database if
+        it hasn't been loaded yet.
+        """
+        name = self.player_names.get(player_id)
+        if name is None:
+            player = Player.from_json(player_id)
+            name = {'last_name': player.last_name,
+                    'first_name': player.first_name}
+            self.player_names[player.software_id] = name
+        return name
+
     def prepare_match(self, match_obj):
         """ Prepare the datas of a match to send to the view for display. """
-        match_id = match_obj.software_id.split('_')[1]
-        player_left = Player.from_json(match_obj.players[0])
-        player_right = Player.from_json(match_obj.players[1])
-        status = self.reformat_match_result(
-            match_obj.score,
-            player_left.software_id,
-            player_right.software_id)
-        return {'match_id': match_id,
-                'left': {'last_name': player_left.last_name,
-                         'first_name': player_left.first_name},
-                'right': {'last_name': player_right.last_name,
-                          'first_name': player_right.first_name},
-                'status': status}
+        player_left_id, player_right_id = match_obj.players
+        return {'match_id': str(match_obj.software_id.number),
+                'left': self.get_player_name(player_left_id),
+                'right': self.get_player_name(player_right_id),
+                'status': self.reformat_match_result(
+                    match_obj.score, player_left_id, player_right_id)}
+
+    def prepare_match_row(self, match_obj):
+        """ Prepare the datas of a match displayed in a round. """
+        player_left_id, player_right_id = match_obj.players
+        return {'id': str(match_obj.software_id.number),
+                'left': self.get_player_name(player_left_id),
+                'right': self.get_player_name(player_right_id),
+                'match_status': self.reformat_match_result(
+                    match_obj.score, player_left_id, player_right_id)}
 
     def prepare_round(self, round_obj):
-        """ Prepare the datas of a round to send to the view for display. """
+        """
+        Prepare the datas of a round to send to the view for display, kept
+        in self.round_views and updated row by row with refresh_match_row().
+        """
+        round_data = self.round_views.get(round_obj.software_id)
+        if round_data is not None:
+            return round_data
         round_data = {'round_key': round_obj.name,
                       'round_name': ' '.join(round_obj.name.split('_')),
-                      'matches': []}
-        for match in round_obj.matches:
-            player_left = Player.from_json(match.players[0])
-            player_right = Player.from_json(match.players[1])
-            status = self.reformat_match_result(match.score,
-                                                player_left.software_id,
-                                                player_right.software_id)
-            match_data = {
-                'id': match.software_id.split('_')[1],
-                'left': {'last_name': player_left.last_name,
-                         'first_name': player_left.first_name},
-                'right': {'last_name': player_right.last_name,
-                          'first_name': player_right.first_name},
-                'match_status': status
-            }
-            round_data['matches'].append(match_data)
+                      'matches': [self.prepare_match_row(match)
+                                  for match in round_obj.matches],
+                      'rows': {match.software_id: index for index, match
+                               in enumerate(round_obj.matches)}}
+        self.round_views[round_obj.software_id] = round_data
         return round_data
 
+    def refresh_match_row(self, round_data, match_obj):
+        """ Update the row of a match in the datas of its round. """
+        index = round_data['rows'][match_obj.software_id]
+        round_data['matches'][index] = self.prepare_match_row(match_obj)
+
     @staticmethod
     def reformat_match_result(match_score, player_left_id, player_right_id):
         """
@@ -272,12 +298,18 @@ class ControllerTournament:
     def reformat_id_name(self):
         """
         Prepare the datas of the players not already participant of a
-        tournament for display in the view.
+        tournament for display in the view, read page by page without
+        building the players.
         """
-        return [{'id': key.split('_')[1], 'last_name': value['last_name'],
-                 'first_name': value['first_name']}
-                for key, value in self.players.items()
-                if key not in self.tournament.participants]
+        participants = self.tournament.participants
+
+        def is_available(software_id, record):
+            return SoftwareId.parse(software_id) not in participants
+
+        return [{'id': str(SoftwareId.parse(software_id).number),
+                 'last_name': record['last_name'],
+                 'first_name': record['first_name']}
+                for software_id, record in Player.cursor(where=is_available)]
 
     def reformat_round_status(self):
         """
@@ -291,7 +323,7 @@ class ControllerTournament:
                 round_id = '   -'
                 status = 'not started'
             else:
-                round_id = value.software_id.split('_')[1]
+                round_id = str(value.software_id.number)
                 if value.is_finished is True:
                     status = 'complete'
                 elif value.time_start is not None:
@@ -304,10 +336,12 @@ class ControllerTournament:
 
     def reformat_name_score(self):
         """ Prepare the datas for display in the ranking part of the view. """
-        return [{'last_name': players.last_name,
-                 'first_name': players.first_name,
+        players = Player.from_json_many(self.tournament.participants)
+        return [{'last_name': player.last_name,
+                 'first_name': player.first_name,
                  'score': score}
-                for (players, score) in self.tournament.participants.values()]
+                for player, (_, score)
+                in zip(players, self.tournament.participants.values())]
 
     @staticmethod
     def sort_key(list_of_dict, sort_fields, reverse=True):
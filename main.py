@@ -1,5 +1,11 @@
+import argparse
 import curses
 from controllers.controller_menu import ControllerMenu
+from models.base_model import _BaseModel
+from models.storage import STORAGE_ENGINES, DURABILITY_POLICIES, DATA_DIR, \
+    create_storage
+from models.storage_deferred import DeferredStorage
+from models.storage_background import BackgroundStorage
 
 
 def main(stdscr):
@@ -8,4 +14,28 @@ def main(stdscr):
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Chess tournament manager")
+    parser.add_argument('--storage', choices=STORAGE_ENGINES, default='json',
+                        help="storage engine of the data directory")
+    parser.add_argument('--data-dir', default=DATA_DIR,
+                        help="directory of the data files")
+    parser.add_argument('--durability', choices=DURABILITY_POLICIES,
+                        help="when written files are synced to the disk"
+                             " (default: none for the files, batch for"
+                             " sqlite)")
+    parser.add_argument('--deferred', type=float, default=0,
+                        metavar='SECONDS',
+                        help="delay and group the writes, no change older"
+                             " than SECONDS is left unsaved (default: 0,"
+                             " write immediately)")
+    parser.add_argument('--background', action='store_true',
+                        help="write to the disk in a background thread")
+    arguments = parser.parse_args()
+    storage = create_storage(arguments.storage, arguments.data_dir,
+                             arguments.durability)
+    if arguments.background:
+        storage = BackgroundStorage(storage)
+    if arguments.deferred > 0:
+        storage = DeferredStorage(storage, max_delay=arguments.deferred)
+    _BaseModel.use_storage(storage)
     curses.wrapper(main)
@@ -1,64 +1,294 @@
-import os.path
-import json
+import copy
 from abc import ABC, abstractmethod
-from typing import Dict
+from contextlib import contextmanager
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional, Set,
+                    Tuple, Union)
+from models.software_id import SoftwareId
+from models.storage import Storage, JsonStorage
 
 
 class _BaseModel(ABC):
     """
     Abstract base class for all models, take care of every actions that
     require an interaction with the database.
+
+    The records are read and written through a storage engine (JSON files
+    by default, see models/storage.py) selected with use_storage().
+    The instances already built from the storage are kept in an identity
+    map, invalidated when the storage reports a new version of a collection
+    (manual edit of a data file).
+
+    Inside a batch() block, saved instances are only collected and every
+    affected collection is written once when the block ends.
+
+    Each instance keeps the last record read from or written to the storage,
+    an instance whose record hasn't changed since is not written again.
+
+    A model can maintain collections derived from its records, such as an
+    index, with _get_derived_records(); they are written with the records.
+
+    Models kept in large numbers declare their attributes in __slots__.
     """
-    def __init__(self):
-        self.software_id = self.generate_new_software_id()
+    __slots__ = ('software_id', '_saved_record')
+    _storage: Storage = JsonStorage()
+    _instances: Dict[str, Tuple[int, Dict[str, '_BaseModel']]] = {}
+    _pending: Optional[Dict[str, Dict[str, '_BaseModel']]] = None
+    cache_stats: Dict[str, int] = {'hits': 0, 'misses': 0}
+    write_stats: Dict[str, int] = {'writes': 0, 'skipped_writes': 0}
+
+    def __init__(self,
+                 software_id: Optional[Union[str, SoftwareId]] = None):
+        """
+        :param software_id: ID loaded from the database or reserved with
+        reserve_software_ids(), a new one is allocated if None.
+        """
+        if software_id is None:
+            software_id = self.generate_new_software_id()
+        self.software_id = SoftwareId.parse(software_id)
+        self._saved_record: Optional[Dict[str, object]] = None
+
+    @staticmethod
+    def get_id_number(software_id: Union[str, SoftwareId]) -> int:
+        return SoftwareId.parse(software_id).number
 
     @classmethod
     def class_name_plural(cls):
         return f"{cls.__name__.lower()}s"
 
+    @staticmethod
+    def use_storage(storage: Storage):
+        """
+        Select the storage engine used by every model and empty the
+        identity map.
+        """
+        _BaseModel._storage = storage
+        _BaseModel._instances.clear()
+        SoftwareId.clear_interned()
+
+    @staticmethod
+    def get_storage() -> Storage:
+        return _BaseModel._storage
+
+    @staticmethod
+    def flush():
+        """
+        Persist the writes delayed by the storage engine, if any, and return
+        once they are written. Used where durability is needed.
+        """
+        _BaseModel._storage.flush()
+
     @classmethod
-    def get_path(cls):
-        base_path = os.path.dirname(__file__)
-        return os.path.join(base_path, '..', 'data',
-                            f"{cls.class_name_plural()}.json")
+    def _get_instances(cls) -> Dict[str, '_BaseModel']:
+        """
+        Return the identity map of the class, refreshed with
+        _refresh_instances() if the collection has been modified outside the
+        application since it was filled.
+        :return: {'<software_id>': instance}
+        """
+        name = cls.class_name_plural()
+        version = _BaseModel._storage.version(name)
+        cached = _BaseModel._instances.get(name)
+        if cached is None or cached[0] != version:
+            instances = {} if cached is None \
+                else cls._refresh_instances(cached[1])
+            cached = (version, instances)
+            _BaseModel._instances[name] = cached
+        return cached[1]
+
+    @classmethod
+    def _refresh_instances(cls, instances: Dict[str, '_BaseModel']
+                           ) -> Dict[str, '_BaseModel']:
+        """
+        Called when the collection has been modified outside the
+        application, return the instances still valid. By default, every
+        instance is dropped and read again on next access.
+        :param instances: the outdated identity map
+        """
+        return {}
 
     @classmethod
     def get_data(cls):
-        with open(cls.get_path(), 'r', encoding='utf-8') as file:
-            return json.load(file)
+        """
+        Return a copy of the data of the class, safe to modify.
+        :return: {'<class_name_plural>': {'<software_id>': {...}}}
+        """
+        name = cls.class_name_plural()
+        return {name: copy.deepcopy(_BaseModel._storage.records(name))}
+
+    @classmethod
+    def cursor(cls, offset: int = 0, limit: Optional[int] = None,
+               where: Optional[Callable[[str, dict], bool]] = None
+               ) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterate over copies of the records of the class in the order of
+        their software IDs, only the iterated records are read and copied.
+        :param offset: number of matching records skipped
+        :param limit: maximum number of records, every record if None
+        :param where: filter called with the software ID and the record
+        :return: iterator of ('<software_id>', {...})
+        """
+        for software_id, record in _BaseModel._storage.scan(
+                cls.class_name_plural(), offset, limit, where):
+            yield software_id, copy.deepcopy(record)
+
+    @classmethod
+    def get_records(cls, software_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Return copies of the records of several software IDs, read at once.
+        :return: {'<software_id>': {...}}, without the IDs that don't exist
+        """
+        records = _BaseModel._storage.get_many(
+            cls.class_name_plural(),
+            [str(software_id) for software_id in software_ids])
+        return copy.deepcopy(records)
+
+    @classmethod
+    def count_records(cls) -> int:
+        """ Number of records of the class in the database. """
+        return _BaseModel._storage.count(cls.class_name_plural())
+
+    @classmethod
+    def reset_cache(cls):
+        """
+        Forget every record kept in memory by the storage engine and every
+        instance of the identity map.
+        """
+        _BaseModel._storage.clear_cache()
+        _BaseModel._instances.clear()
+        SoftwareId.clear_interned()
+        for stats in (_BaseModel.cache_stats, _BaseModel.write_stats):
+            for key in stats:
+                stats[key] = 0
 
     @classmethod
     def generate_new_software_id(cls):
         """
         Create a new exclusive software ID for an instance of a class.
-        The id is generated based on the class name and the number of the
-        last instance found in the database.
+        The id is generated based on the class name and the sequence counter
+        of the collection, saved in the database with the next write.
         :return: str: '<class_first_letter>_<number>'
         """
-        data = cls.get_data()
-        ids = [int(software_id.split("_")[1]) for software_id
-               in data[cls.class_name_plural()].keys()]
+        return cls.reserve_software_ids(1)[0]
+
+    @classmethod
+    def reserve_software_ids(cls, count: int) -> List[SoftwareId]:
+        """
+        Reserve a block of consecutive software IDs with a single update of
+        the sequence counter.
+        :param count: number of IDs to reserve
+        :return: [SoftwareId('<class_first_letter>_<number>'), ...]
+        """
+        first_id = _BaseModel._storage.allocate_ids(cls.class_name_plural(),
+                                                    count)
         class_letter = cls.__name__[0].lower()
-        new_id = max(ids) + 1 if ids else 1
-        return f"{class_letter}_{new_id}"
+        return [SoftwareId.of(class_letter, number) for number
+                in range(first_id, first_id + count)]
 
     @classmethod
     def from_json(cls, software_id):
         """
-        create an instance of a class from a JSON file.
-        :param software_id: str: '<class_first_letter>_<number>'
+        create an instance of a class from the database.
+        The same instance is returned for the same software_id as long as
+        the data is not modified outside the application.
+        :param software_id: '<class_first_letter>_<number>' or SoftwareId
         :return instance: an instance of a class
         """
         try:
-            data = cls.get_data()
-            if software_id not in data[cls.class_name_plural()]:
+            instances = cls._get_instances()
+            if software_id in instances:
+                _BaseModel.cache_stats['hits'] += 1
+                return instances[software_id]
+            item_data = _BaseModel._storage.get(cls.class_name_plural(),
+                                                str(software_id))
+            if item_data is None:
                 raise KeyError
-            item_data = data[cls.class_name_plural()][software_id]
-            return cls._create_instance_from_json(item_data, software_id,
-                                                  save_to_db=False)
+            return cls._add_instance_from_json(instances, item_data,
+                                               software_id)
         except KeyError as ke:
             raise ke
 
+    @classmethod
+    def from_json_many(cls, software_ids: Iterable[Union[str, SoftwareId]]
+                       ) -> List['_BaseModel']:
+        """
+        create the instances of several software IDs, the ones missing from
+        the identity map are read from the database at once.
+        :param software_ids: ['<class_first_letter>_<number>', ...]
+        :return: the instances, in the order of software_ids
+        """
+        software_ids = list(software_ids)
+        instances = cls._get_instances()
+        missing = [software_id for software_id in dict.fromkeys(software_ids)
+                   if software_id not in instances]
+        _BaseModel.cache_stats['hits'] += len(software_ids) - len(missing)
+        if missing:
+            records = _BaseModel._storage.get_many(
+                cls.class_name_plural(),
+                [str(software_id) for software_id in missing])
+            for software_id in missing:
+                item_data = records.get(str(software_id))
+                if item_data is None:
+                    raise KeyError(software_id)
+                cls._add_instance_from_json(instances, item_data, software_id)
+        return [instances[software_id] for software_id in software_ids]
+
+    @classmethod
+    def get_all(cls) -> List['_BaseModel']:
+        """
+        Return the instances of every record of the collection, the ones
+        missing from the identity map are built from a single read.
+        """
+        instances = cls._get_instances()
+        records = _BaseModel._storage.records(cls.class_name_plural())
+        result = []
+        for software_id, item_data in records.items():
+            instance = instances.get(software_id)
+            if instance is None:
+                instance = cls._add_instance_from_json(instances, item_data,
+                                                       software_id)
+            else:
+                _BaseModel.cache_stats['hits'] += 1
+            result.append(instance)
+        return result
+
+    @classmethod
+    def _add_instance_from_json(cls, instances: Dict[str, '_BaseModel'],
+                                item_data: dict,
+                                software_id: Union[str, SoftwareId]
+                                ) -> '_BaseModel':
+        """ Create an instance from its record and add it to the map. """
+        _BaseModel.cache_stats['misses'] += 1
+        instance = cls._create_instance_from_json(item_data, software_id,
+                                                  save_to_db=False)
+        instance._saved_record = item_data
+        instances[instance.software_id] = instance
+        return instance
+
+    @classmethod
+    def lazy(cls, software_id: Union[str, SoftwareId]
+             ) -> Union['_BaseModel', 'LazyInstance']:
+        """
+        Reference an instance of the database without reading it, it is
+        created with from_json() on the first access to its attributes.
+        The instance itself is returned if it has already been read.
+        :param software_id: str: '<class_first_letter>_<number>'
+        """
+        instance = cls._get_instances().get(software_id)
+        if instance is not None:
+            return instance
+        return LazyInstance(cls, software_id)
+
+    @classmethod
+    def _get_derived_records(cls, records: Dict[str, dict]
+                             ) -> Dict[str, Dict[str, dict]]:
+        """
+        Called before records of the class are written, return the records
+        of other collections to write with them. None by default.
+        :param records: {'<software_id>': {...}} about to be written
+        :return: {'<collection>': {'<software_id>': {...}}}
+        """
+        return {}
+
     @classmethod
     @abstractmethod
     def _create_instance_from_json(cls, item_data, software_id,
@@ -74,15 +304,83 @@ class _BaseModel(ABC):
         """
         raise NotImplementedError
 
+    @staticmethod
+    @contextmanager
+    def batch():
+        """
+        Unit of work, every instance saved inside the block is collected and
+        written when the outermost block ends, with one write per affected
+        data file. Nothing is written if the block raises an exception.
+        """
+        if _BaseModel._pending is not None:
+            yield
+            return
+        _BaseModel._pending = {}
+        try:
+            yield
+            pending = _BaseModel._pending
+        finally:
+            _BaseModel._pending = None
+        _BaseModel._write_instances(pending)
+
+    @staticmethod
+    def _write_instances(pending: Dict[str, Dict[str, '_BaseModel']]):
+        """
+        Write instances to the storage, each collection is written once, and
+        add them to the identity map. Instances without any dirty field are
+        skipped. The storage commits the whole group once at the end, the
+        instances only count as saved once the commit succeeded, so a
+        failed write is tried again by the next save.
+        :param pending: {'<class_name_plural>': {'<software_id>': instance}}
+        """
+        saved = []
+        for name, instances in pending.items():
+            model = type(next(iter(instances.values())))
+            records = {}
+            for software_id, instance in instances.items():
+                record = instance._prepare_data_to_save()
+                if record == instance._saved_record:
+                    _BaseModel.write_stats['skipped_writes'] += 1
+                    continue
+                records[str(software_id)] = record
+                saved.append((instance, record))
+            if records:
+                derived = model._get_derived_records(records)
+                _BaseModel._storage.write(name, records)
+                _BaseModel.write_stats['writes'] += len(records)
+                for collection, derived_records in derived.items():
+                    _BaseModel._storage.write(collection, derived_records)
+            model._get_instances().update(instances)
+        if saved:
+            _BaseModel._storage.commit()
+        for instance, record in saved:
+            instance._saved_record = record
+
+    def get_dirty_fields(self) -> Set[str]:
+        """
+        Compare the instance with its last record read from or written to
+        the storage.
+        :return: the fields of _prepare_data_to_save that have changed
+        """
+        record = self._prepare_data_to_save()
+        if self._saved_record is None:
+            return set(record)
+        saved = self._saved_record
+        return {field for field in set(record) | set(saved)
+                if field not in record or field not in saved
+                or record[field] != saved[field]}
+
     def save_to_database(self):
         """
-        Save the instance of a class to a JSON file.
+        Save the instance of a class to the database, or delay the write to
+        the end of the current batch(). Nothing is written if the instance
+        hasn't changed since it was read or saved.
         """
-        data = self.get_data()
-        data[self.class_name_plural()][self.software_id] = (
-            self._prepare_data_to_save())
-        with open(self.get_path(), 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=4)
+        name = self.class_name_plural()
+        if _BaseModel._pending is not None:
+            _BaseModel._pending.setdefault(name, {})[self.software_id] = self
+            return
+        self._write_instances({name: {self.software_id: self}})
 
     @abstractmethod
     def _prepare_data_to_save(self) -> Dict[str, object]:
@@ -93,3 +391,37 @@ class _BaseModel(ABC):
         :return: Dict[str, object]
         """
         raise NotImplementedError
+
+
+class LazyInstance:
+    """
+    Stand-in for an instance of a model that hasn't been read from the
+    database yet. software_id is known without reading, any other attribute
+    is read from the instance returned by from_json() on first access.
+    """
+    __slots__ = ('software_id', '_model', '_instance')
+
+    def __init__(self, model: type, software_id: Union[str, SoftwareId]):
+        object.__setattr__(self, 'software_id',
+                           SoftwareId.parse(software_id))
+        object.__setattr__(self, '_model', model)
+        object.__setattr__(self, '_instance', None)
+
+    def resolve(self) -> _BaseModel:
+        """ Return the instance, read from the database on the first call. """
+        if self._instance is None:
+            object.__setattr__(self, '_instance',
+                               self._model.from_json(self.software_id))
+        return self._instance
+
+    def is_loaded(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.resolve(), name, value)
+
+    def __repr__(self):
+        return f"<lazy {self._model.__name__} {self.software_id}>"
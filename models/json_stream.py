@@ -0,0 +1,232 @@
+import argparse
+import json
+import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# a key and its colon, then the end of a member, with their whitespaces
+MEMBER_KEY = re.compile(r'[ \t\n\r]*"((?:[^"\\]|\\.)*)"'
+                        r'[ \t\n\r]*:[ \t\n\r]*')
+MEMBER_END = re.compile(r'[ \t\n\r]*([,}])')
+CHUNK_SIZE = 64 * 1024
+
+
+class RecordReader:
+    """
+    Incremental reader of a data file, {'<collection>': {'<software_id>':
+    {...}}, 'last_id': <number>}, yielding the records one by one while the
+    file is read in chunks. Only the current chunk and the current record
+    are kept in memory, whatever the size of the file.
+    The other top-level values, such as 'last_id', are kept in
+    self.values once they have been read.
+
+        reader = RecordReader('data/matches.json', 'matches')
+        for software_id, record in reader:
+            ...
+        last_id = reader.values.get('last_id', 0)
+    """
+    def __init__(self, path: str, collection: str,
+                 chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.values: Dict[str, object] = {}
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buffer = ''
+        self._position = 0
+        self._end_of_file = False
+
+    def _read_chunk(self) -> bool:
+        """
+        Add a chunk of the file to the buffer, without the part already
+        parsed.
+        :return: False at the end of the file
+        """
+        chunk = self._file.read(self.chunk_size)
+        if not chunk:
+            self._end_of_file = True
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def _error(self, message: str):
+        return json.JSONDecodeError(message, self._buffer, self._position)
+
+    def _peek(self) -> str:
+        """ Skip the whitespaces, return the next character or ''. """
+        while True:
+            self._position = WHITESPACE.match(self._buffer,
+                                              self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read_chunk():
+                return ''
+
+    def _expect(self, characters: str) -> str:
+        """ Consume the next character, which must be one of characters. """
+        character = self._peek()
+        if not character or character not in characters:
+            raise self._error(f"Expecting one of {characters!r}")
+        self._position += 1
+        return character
+
+    def _decode(self):
+        """
+        Decode the next value. A value ending with the buffer can be cut
+        (a number), it is only accepted once the next chunk is read.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer,
+                                                      self._position)
+                if end < len(self._buffer) or self._end_of_file:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._end_of_file:
+                    raise
+            self._read_chunk()
+
+    def _iter_keys(self) -> Iterator[str]:
+        """
+        Yield the key of each member of an object, the caller decodes the
+        value before asking for the next key.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+        while True:
+            key = self._decode()
+            if not isinstance(key, str):
+                raise self._error("Expecting a key")
+            self._expect(':')
+            yield key
+            if self._expect(',}') == '}':
+                return
+
+    def _iter_members(self) -> Iterator[Tuple[str, object]]:
+        """
+        Yield the key and the value of each member of an object. A member
+        cut by the end of the buffer is parsed again once the next chunk is
+        read.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._position += 1
+            return
+        while True:
+            buffer = self._buffer
+            key = MEMBER_KEY.match(buffer, self._position)
+            try:
+                if key is None:
+                    raise self._error("Expecting a key")
+                value, end = self._decoder.raw_decode(buffer, key.end())
+                member_end = MEMBER_END.match(buffer, end)
+                if member_end is None:
+                    raise self._error("Expecting ',' or '}'")
+            except json.JSONDecodeError:
+                if self._read_chunk():
+                    continue
+                raise
+            self._position = member_end.end()
+            name = key.group(1)
+            if '\\' in name:
+                name = json.loads(f'"{name}"')
+            yield name, value
+            if member_end.group(1) == '}':
+                return
+
+    def __iter__(self) -> Iterator[Tuple[str, dict]]:
+        with open(self.path, 'r', encoding='utf-8') as self._file:
+            for key in self._iter_keys():
+                if key == self.collection:
+                    yield from self._iter_members()
+                else:
+                    self.values[key] = self._decode()
+            if self._peek():
+                raise self._error("Extra data")
+
+
+def iter_records(path: str, collection: str,
+                 chunk_size: int = CHUNK_SIZE
+                 ) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield the records of a data file one by one, see RecordReader.
+    :return: iterator of ('<software_id>', {...})
+    """
+    return iter(RecordReader(path, collection, chunk_size))
+
+
+def dump_records(path: str, collection: str,
+                 records: Iterable[Tuple[str, dict]],
+                 last_id: Optional[int] = None) -> int:
+    """
+    Write records one by one to a data file, in the format written by
+    json.dump(data, file, indent=4).
+    :param records: iterable of ('<software_id>', {...})
+    :param last_id: sequence counter, the highest ID written if None
+    :return: number of records written
+    """
+    count = 0
+    highest_id = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(f"{{\n    {json.dumps(collection)}: {{")
+        for software_id, record in records:
+            lines = json.dumps(record, indent=4).replace('\n', '\n        ')
+            file.write(f"{',' if count else ''}\n"
+                       f"        {json.dumps(software_id)}: {lines}")
+            count += 1
+            highest_id = max(highest_id, int(software_id.split('_')[1]))
+        if count:
+            file.write("\n    ")
+        if last_id is None:
+            last_id = highest_id
+        file.write(f"}},\n    \"last_id\": {last_id}\n}}")
+    return count
+
+
+def check_file(path: str, collection: str) -> Dict[str, object]:
+    """
+    Check a data file in a single pass, without loading it.
+    :return: {'records': <count>, 'last_id': <sequence counter or None>,
+    'highest_id': <number>, 'duplicates': ['<software_id>', ...]}
+    """
+    reader = RecordReader(path, collection)
+    seen = set()
+    duplicates = []
+    highest_id = 0
+    for software_id, record in reader:
+        if software_id in seen:
+            duplicates.append(software_id)
+        seen.add(software_id)
+        highest_id = max(highest_id, int(software_id.split('_')[1]))
+    return {'records': len(seen),
+            'last_id': reader.values.get('last_id'),
+            'highest_id': highest_id,
+            'duplicates': duplicates}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Check the data files of collections in a single pass.")
+    parser.add_argument('paths', nargs='+',
+                        help="data files, named <collection>.json")
+    arguments = parser.parse_args()
+    for file_path in arguments.paths:
+        name = file_path.replace('\\', '/').split('/')[-1].rsplit('.', 1)[0]
+        result = check_file(file_path, name)
+        problems = []
+        if result['duplicates']:
+            problems.append(f"duplicated IDs {result['duplicates']}")
+        # a missing counter is replaced by the highest ID when loaded
+        if (result['last_id'] is not None
+                and result['last_id'] < result['highest_id']):
+            problems.append(f"last_id {result['last_id']} is lower than"
+                            f" {result['highest_id']}")
+        print(f"{file_path}: {result['records']} records"
+              f"{', ' + ', '.join(problems) if problems else ', ok'}")
@@ -1,12 +1,25 @@
 from models.base_model import _BaseModel
-from typing import Dict
+from models.software_id import SoftwareId
+from typing import Dict, Optional, Tuple, Union
 
 
 class Match(_BaseModel):
+    """
+    The result of a match is stored as a single code, the score of each
+    player is computed from it. Scores without a code, as edited by hand in
+    the database, are kept as they are in place of the code.
+    """
+    __slots__ = ('players', 'result', 'is_finished')
+    PENDING, WIN_LEFT, WIN_RIGHT, DRAW = range(4)
+    # (left score, right score) of each result code
+    SCORES: Tuple[Tuple[float, float], ...] = ((0.0, 0.0), (1.0, 0.0),
+                                               (0.0, 1.0), (0.5, 0.5))
+
     def __init__(self,
                  player_1_software_id: str,
                  player_2_software_id: str,
-                 save_to_db=True):
+                 save_to_db=True,
+                 software_id: Optional[str] = None):
         """
         Initialize a new match instance
         before initialization, players are sorted with their id numbers to
@@ -14,15 +27,14 @@ class Match(_BaseModel):
         :param player_1_software_id: string "p_<number>"
         :param player_2_software_id: string "p_<number>"
         :param save_to_db: if true, save the instance in the database
+        :param software_id: ID loaded from the database or reserved
         """
-        super().__init__()
-        # sort players ID based on the number and not the string["p_8", "p_11"]
-        self.players = sorted([player_1_software_id, player_2_software_id],
-                              key=lambda x: int(x.split('_')[1]))
-        self.score: Dict[str, float] = {
-            self.players[0]: 0.0,
-            self.players[1]: 0.0
-        }
+        super().__init__(software_id)
+        # SoftwareId are sorted by number and not as strings["p_8", "p_11"]
+        self.players: Tuple[SoftwareId, SoftwareId] = tuple(
+            sorted([SoftwareId.parse(player_1_software_id),
+                    SoftwareId.parse(player_2_software_id)]))
+        self.result: Union[int, Tuple[float, float]] = self.PENDING
         self.is_finished: bool = False
         if save_to_db:
             self.save_to_database()
@@ -35,6 +47,24 @@ class Match(_BaseModel):
         """
         return "matches"
 
+    @property
+    def score(self) -> Dict[SoftwareId, float]:
+        """
+        Score of each player, computed from the result code.
+        :return: {'<left_player_id>': 1.0, '<right_player_id>': 0.0}
+        """
+        left_score, right_score = self._get_scores()
+        return {self.players[0]: left_score, self.players[1]: right_score}
+
+    def _get_scores(self) -> Tuple[float, float]:
+        """
+        Scores of the left and right players.
+        :return: (left score, right score)
+        """
+        if isinstance(self.result, tuple):
+            return self.result
+        return self.SCORES[self.result]
+
     @classmethod
     def _create_instance_from_json(cls,
                                    item_data: Dict[str, object],
@@ -49,19 +79,22 @@ class Match(_BaseModel):
         :return: An instance of Match
         """
         is_finished = item_data['complete']
-        del item_data['complete']
-        match_data = list(item_data.items())
-
-        player_scores = {player_id: score for player_id, score in match_data}
-        sorted_players = sorted(player_scores.keys(),
-                                key=lambda x: int(x.split('_')[1]))
+        # item_data is shared with the identity map, it must not be modified
+        player_scores = {SoftwareId.parse(player_id): score
+                         for player_id, score in item_data.items()
+                         if player_id != 'complete'}
+        sorted_players = sorted(player_scores)
 
         instance = cls(player_1_software_id=sorted_players[0],
                        player_2_software_id=sorted_players[1],
-                       save_to_db=False)
-        instance.software_id = match_id
-        instance.score[sorted_players[0]] = player_scores[sorted_players[0]]
-        instance.score[sorted_players[1]] = player_scores[sorted_players[1]]
+                       save_to_db=False,
+                       software_id=match_id)
+        scores = (player_scores[sorted_players[0]],
+                  player_scores[sorted_players[1]])
+        if scores in cls.SCORES:
+            instance.result = cls.SCORES.index(scores)
+        else:
+            instance.result = scores
         instance.is_finished = is_finished
 
         return instance
@@ -71,9 +104,10 @@ class Match(_BaseModel):
         Prepare data to save in the database.
         :return: dictionary with data to save in the database
         """
-        data = self.score.copy()
-        data["complete"] = self.is_finished
-        return data
+        left_score, right_score = self._get_scores()
+        return {str(self.players[0]): left_score,
+                str(self.players[1]): right_score,
+                "complete": self.is_finished}
 
     def _update_match(self, update_is_finished: bool = True):
         self.is_finished = update_is_finished
@@ -89,11 +123,13 @@ class Match(_BaseModel):
         message without stopping the application.
         """
         if not self.is_finished:
-            if player_software_id in self.score:
-                self.score[player_software_id] = 1.0
-                self._update_match()
+            if player_software_id == self.players[0]:
+                self.result = self.WIN_LEFT
+            elif player_software_id == self.players[1]:
+                self.result = self.WIN_RIGHT
             else:
                 raise ValueError
+            self._update_match()
 
     def draw(self):
         """
@@ -103,8 +139,7 @@ class Match(_BaseModel):
         message without stopping the application.
         """
         if not self.is_finished:
-            self.score = {player_software_id: 0.5 for player_software_id
-                          in self.players}
+            self.result = self.DRAW
             self._update_match()
 
     def reset_match_result(self):
@@ -114,6 +149,5 @@ class Match(_BaseModel):
         :return:
         """
         if self.is_finished:
-            self.score = {player_software_id: 0.0 for player_software_id
-                          in self.players}
+            self.result = self.PENDING
             self._update_match(update_is_finished=False)
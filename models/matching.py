@@ -0,0 +1,573 @@
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+
+class Matching(NamedTuple):
+    """
+    Result of max_weight_matching(): mates[v] is the vertex matched with
+    v, -1 if v is single. The duals and the parents of the blossoms are
+    indexed by vertex, then by blossom from n: duals[v] is twice the dual
+    of the vertex v, duals[b] the dual of the blossom b, parents[b] the
+    blossom containing b or -1.
+    They give the reduced cost of any pair, a pair missing from the graph
+    with a negative reduced cost could improve the matching, the matching
+    stays optimal with every pair whose reduced cost is positive or null.
+    labels[v] is the label of the top-level blossom tops[v] of the vertex
+    v in the last stage, 1 outer, 2 inner or 0, see is_maximum().
+    """
+    mates: List[int]
+    duals: List[int]
+    parents: List[int]
+    labels: List[int]
+    tops: List[int]
+
+    def is_maximum(self, is_excluded: Callable[[int, int], bool]) -> bool:
+        """
+        Check that the matching of maximum cardinality of the graph is
+        also one of the complete graph without the excluded pairs: the
+        outer vertices of the last stage must not meet a vertex that is
+        neither inner and alone in its blossom nor in their own blossom.
+        Each outer blossom is then an odd component once the inner
+        vertices are removed, which leaves at least as many single
+        vertices as the matching (Tutte-Berge formula).
+        False doesn't prove that a larger matching exists.
+        :param is_excluded: is_excluded(i, j) if the pair can't be matched
+        """
+        # vertices that outer vertices must not meet, by top-level blossom
+        by_top: Dict[int, List[int]] = {}
+        for v, (label, top) in enumerate(zip(self.labels, self.tops)):
+            if label != 2 or top != v:
+                by_top.setdefault(top, []).append(v)
+        for top, members in by_top.items():
+            outer = [v for v in members if self.labels[v] == 1]
+            if not outer:
+                continue
+            others = [u for other_top, other_members in by_top.items()
+                      if other_top != top for u in other_members]
+            for v in outer:
+                for u in others:
+                    if not is_excluded(min(u, v), max(u, v)):
+                        return False
+        return True
+
+    def reduced_cost(self, i: int, j: int, weight: int) -> int:
+        """
+        :return: slack of the pair under the final duals, counted twice
+        """
+        cost = self.duals[i] + self.duals[j] - 2 * weight
+        ancestors = set()
+        b = self.parents[i]
+        while b != -1:
+            ancestors.add(b)
+            b = self.parents[b]
+        b = self.parents[j]
+        while b != -1:
+            if b in ancestors:
+                cost += 2 * self.duals[b]
+            b = self.parents[b]
+        return cost
+
+    def find_improving_pairs(self, classes: List[int],
+                             class_weight: Callable[[int, int], int],
+                             is_excluded: Callable[[int, int], bool]
+                             ) -> Dict[Tuple[int, int], int]:
+        """
+        Find the pairs of vertices with a negative reduced cost, when the
+        weight of a pair only depends on the classes of its vertices.
+        Each pair is searched in its lowest common blossom, or at the top
+        for the vertices of different top-level blossoms, where the duals
+        of the blossoms containing both vertices are known. Blossoms with a
+        null dual are merged with their parent, they don't change the cost.
+        The cheapest vertices of two classes bound the cost of their pairs,
+        and the cheapest vertex of a class in another child bounds the cost
+        of the pairs of a vertex, so the pairs are only enumerated when one
+        of them is negative. The vertices of a class are sorted by dual,
+        then by child, so the vertices of the child of a vertex are skipped
+        at once.
+        :param classes: class of each vertex
+        :param class_weight: weight of a pair from the classes of its
+        vertices
+        :param is_excluded: is_excluded(i, j) if the pair can't be matched
+        :return: {(i, j): weight, ...} with i < j
+        """
+        duals = self.duals
+        # vertices of each blossom (-1 for the top) by class, with the child
+        # of the blossom containing them, and twice the duals of the
+        # blossoms containing a blossom
+        members: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+        common_duals = {-1: 0}
+        for v in range(len(self.mates)):
+            path = [v]
+            b = self.parents[v]
+            while b != -1:
+                if duals[b]:
+                    path.append(b)
+                b = self.parents[b]
+            path.append(-1)
+            for depth in range(len(path) - 1, 0, -1):
+                b = path[depth]
+                members.setdefault(b, {}).setdefault(classes[v], []).append(
+                    (v, path[depth - 1]))
+                if b not in common_duals:
+                    common_duals[b] = (common_duals[path[depth + 1]]
+                                       + 2 * duals[b])
+        improving = {}
+        for b, by_class in members.items():
+            # cheapest dual of each class with its child, and the cheapest
+            # dual of the other children; run_ends[c][k] is the index after
+            # the members of class c with the dual and the child of k
+            cheapest = {}
+            run_ends = {}
+            for member_class, class_members in by_class.items():
+                class_members.sort(
+                    key=lambda member: (duals[member[0]], member[1]))
+                ends = run_ends[member_class] = [0] * len(class_members)
+                end = len(class_members)
+                for k in range(len(class_members) - 1, -1, -1):
+                    if k + 1 < end and (
+                            class_members[k][1] != class_members[k + 1][1]
+                            or duals[class_members[k][0]]
+                            != duals[class_members[k + 1][0]]):
+                        end = k + 1
+                    ends[k] = end
+                v, child = class_members[0]
+                other_dual = next((duals[u] for u, u_child in class_members
+                                   if u_child != child), float('inf'))
+                cheapest[member_class] = (duals[v], child, other_dual)
+            for first_class, first_members in by_class.items():
+                for second_class, best in cheapest.items():
+                    weight = class_weight(first_class, second_class)
+                    limit = 2 * weight - common_duals[b]
+                    if cheapest[first_class][0] + best[0] >= limit:
+                        continue
+                    for v, child in first_members:
+                        other_dual = best[0] if best[1] != child else best[2]
+                        if duals[v] + other_dual >= limit:
+                            if duals[v] + best[0] >= limit:
+                                break
+                            continue
+                        second_members = by_class[second_class]
+                        ends = run_ends[second_class]
+                        k = 0
+                        while k < len(second_members):
+                            u, u_child = second_members[k]
+                            if duals[v] + duals[u] >= limit:
+                                break
+                            if u_child == child:
+                                k = ends[k]
+                                continue
+                            pair = (min(u, v), max(u, v))
+                            if (pair not in improving
+                                    and not is_excluded(*pair)):
+                                improving[pair] = weight
+                            k += 1
+        return improving
+
+
+def max_weight_matching(edges: Sequence[Tuple[int, int, int]],
+                        max_cardinality: bool = False,
+                        warm_start: bool = True,
+                        vertex_count: int = 0) -> Matching:
+    """
+    Compute a maximum weight matching of a general graph with Edmonds'
+    blossom algorithm, in its primal-dual form (Galil, "Efficient
+    algorithms for finding maximum matching in graphs", 1986), after the
+    public domain implementation of Joris van Rantwijk.
+    Weights must be integers, the dual variables then stay integers.
+
+    The vertex duals start at the maximum weight, so the edges of maximum
+    weight are tight: with warm_start, they are matched greedily in the
+    order of the list before the first stage, and each stage of the
+    algorithm only has to find one of the remaining augmenting paths.
+
+    :param edges: [(i, j, weight), ...] with vertices numbered from 0
+    :param max_cardinality: only consider the matchings of maximum
+    cardinality, and among them return one of maximum weight
+    :param warm_start: match the edges of maximum weight greedily first
+    :param vertex_count: number of vertices, at least the ones of the edges
+    :return: Matching(mates, duals, parents, labels, tops)
+    """
+    edge_count = len(edges)
+    vertex_count = max([vertex_count] + [1 + max(i, j) for i, j, _ in edges])
+    max_weight = max([0] + [weight for _, _, weight in edges])
+
+    # endpoint[p] is the vertex of the endpoint p, edge k has the endpoints
+    # 2k and 2k + 1; neighbour_ends[v] are the remote endpoints of the edges
+    # of v
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * edge_count)]
+    neighbour_ends = [[] for _ in range(vertex_count)]
+    for k, (i, j, _) in enumerate(edges):
+        neighbour_ends[i].append(2 * k + 1)
+        neighbour_ends[j].append(2 * k)
+
+    # mate[v]: remote endpoint of the matched edge of v, or -1
+    mate = vertex_count * [-1]
+    # label of the top-level blossoms and of the vertices: 0 free, 1 S,
+    # 2 T; label_end is the endpoint through which the label was assigned
+    label = (2 * vertex_count) * [0]
+    label_end = (2 * vertex_count) * [-1]
+    in_blossom = list(range(vertex_count))
+    blossom_parent = (2 * vertex_count) * [-1]
+    blossom_children = (2 * vertex_count) * [None]
+    blossom_base = list(range(vertex_count)) + vertex_count * [-1]
+    blossom_ends = (2 * vertex_count) * [None]
+    best_edge = (2 * vertex_count) * [-1]
+    blossom_best_edges = (2 * vertex_count) * [None]
+    unused_blossoms = list(range(vertex_count, 2 * vertex_count))
+    # twice the duals of the vertices, duals of the blossoms
+    dual = vertex_count * [max_weight] + vertex_count * [0]
+    allowed_edge = edge_count * [False]
+    queue = []
+
+    def slack(k: int) -> int:
+        i, j, weight = edges[k]
+        return dual[i] + dual[j] - 2 * weight
+
+    def blossom_leaves(b: int) -> List[int]:
+        """ Vertices of a blossom, without recursion: blossoms can nest. """
+        if b < vertex_count:
+            return [b]
+        leaves = []
+        stack = [b]
+        while stack:
+            t = stack.pop()
+            if t < vertex_count:
+                leaves.append(t)
+            else:
+                stack.extend(reversed(blossom_children[t]))
+        return leaves
+
+    def assign_label(w: int, t: int, p: int):
+        b = in_blossom[w]
+        label[w] = label[b] = t
+        label_end[w] = label_end[b] = p
+        best_edge[w] = best_edge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            # the mate of the base of a T-blossom becomes S
+            base = blossom_base[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v: int, w: int) -> int:
+        """
+        Trace back from v and w to find a new blossom or an augmenting path.
+        :return: the base of the new blossom, -1 for an augmenting path
+        """
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = in_blossom[v]
+            if label[b] & 4:
+                base = blossom_base[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if label_end[b] == -1:
+                v = -1
+            else:
+                v = endpoint[label_end[b]]
+                b = in_blossom[v]
+                v = endpoint[label_end[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base: int, k: int):
+        """ Create a blossom from the edge k and the base found. """
+        v, w, _ = edges[k]
+        base_blossom = in_blossom[base]
+        bv = in_blossom[v]
+        bw = in_blossom[w]
+        b = unused_blossoms.pop()
+        blossom_base[b] = base
+        blossom_parent[b] = -1
+        blossom_parent[base_blossom] = b
+        blossom_children[b] = path = []
+        blossom_ends[b] = ends = []
+        while bv != base_blossom:
+            blossom_parent[bv] = b
+            path.append(bv)
+            ends.append(label_end[bv])
+            v = endpoint[label_end[bv]]
+            bv = in_blossom[v]
+        path.append(base_blossom)
+        path.reverse()
+        ends.reverse()
+        ends.append(2 * k)
+        while bw != base_blossom:
+            blossom_parent[bw] = b
+            path.append(bw)
+            ends.append(label_end[bw] ^ 1)
+            w = endpoint[label_end[bw]]
+            bw = in_blossom[w]
+        label[b] = 1
+        label_end[b] = label_end[base_blossom]
+        dual[b] = 0
+        for leaf in blossom_leaves(b):
+            if label[in_blossom[leaf]] == 2:
+                # T-vertices become S-vertices
+                queue.append(leaf)
+            in_blossom[leaf] = b
+        # least-slack edges to the other S-blossoms
+        best_edge_to = {}
+        for child in path:
+            if blossom_best_edges[child] is None:
+                edge_lists = [[p // 2 for p in neighbour_ends[leaf]]
+                              for leaf in blossom_leaves(child)]
+            else:
+                edge_lists = [blossom_best_edges[child]]
+            for edge_list in edge_lists:
+                for edge in edge_list:
+                    i, j, _ = edges[edge]
+                    if in_blossom[j] == b:
+                        i, j = j, i
+                    bj = in_blossom[j]
+                    if (bj != b and label[bj] == 1
+                            and (bj not in best_edge_to
+                                 or slack(edge) < slack(best_edge_to[bj]))):
+                        best_edge_to[bj] = edge
+            blossom_best_edges[child] = None
+            best_edge[child] = -1
+        blossom_best_edges[b] = list(best_edge_to.values())
+        best_edge[b] = -1
+        for edge in blossom_best_edges[b]:
+            if best_edge[b] == -1 or slack(edge) < slack(best_edge[b]):
+                best_edge[b] = edge
+
+    def expand_blossom(b: int, end_of_stage: bool):
+        """ Replace a blossom by its children. """
+        for child in blossom_children[b]:
+            blossom_parent[child] = -1
+            if child < vertex_count:
+                in_blossom[child] = child
+            elif end_of_stage and dual[child] == 0:
+                expand_blossom(child, end_of_stage)
+            else:
+                for leaf in blossom_leaves(child):
+                    in_blossom[leaf] = child
+        if not end_of_stage and label[b] == 2:
+            # relabel the children on the path from the entry child to the
+            # base as T and S alternately
+            entry_child = in_blossom[endpoint[label_end[b] ^ 1]]
+            j = blossom_children[b].index(entry_child)
+            if j & 1:
+                j -= len(blossom_children[b])
+                step = 1
+                end_trick = 0
+            else:
+                step = -1
+                end_trick = 1
+            p = label_end[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossom_ends[b][j - end_trick]
+                               ^ end_trick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowed_edge[blossom_ends[b][j - end_trick] // 2] = True
+                j += step
+                p = blossom_ends[b][j - end_trick] ^ end_trick
+                allowed_edge[p // 2] = True
+                j += step
+            child = blossom_children[b][j]
+            label[endpoint[p ^ 1]] = label[child] = 2
+            label_end[endpoint[p ^ 1]] = label_end[child] = p
+            best_edge[child] = -1
+            j += step
+            while blossom_children[b][j] != entry_child:
+                child = blossom_children[b][j]
+                if label[child] == 1:
+                    j += step
+                    continue
+                for leaf in blossom_leaves(child):
+                    if label[leaf] != 0:
+                        break
+                if label[leaf] != 0:
+                    label[leaf] = 0
+                    label[endpoint[mate[blossom_base[child]]]] = 0
+                    assign_label(leaf, 2, label_end[leaf])
+                j += step
+        label[b] = label_end[b] = -1
+        blossom_children[b] = blossom_ends[b] = None
+        blossom_base[b] = -1
+        blossom_best_edges[b] = None
+        best_edge[b] = -1
+        unused_blossoms.append(b)
+
+    def augment_blossom(b: int, v: int):
+        """
+        Swap the matched and unmatched edges of a blossom along the path
+        from v to the base, v becomes the base.
+        """
+        t = v
+        while blossom_parent[t] != b:
+            t = blossom_parent[t]
+        if t >= vertex_count:
+            augment_blossom(t, v)
+        i = j = blossom_children[b].index(t)
+        if i & 1:
+            j -= len(blossom_children[b])
+            step = 1
+            end_trick = 0
+        else:
+            step = -1
+            end_trick = 1
+        while j != 0:
+            j += step
+            t = blossom_children[b][j]
+            p = blossom_ends[b][j - end_trick] ^ end_trick
+            if t >= vertex_count:
+                augment_blossom(t, endpoint[p])
+            j += step
+            t = blossom_children[b][j]
+            if t >= vertex_count:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossom_children[b] = blossom_children[b][i:] + blossom_children[b][:i]
+        blossom_ends[b] = blossom_ends[b][i:] + blossom_ends[b][:i]
+        blossom_base[b] = blossom_base[blossom_children[b][0]]
+
+    def augment_matching(k: int):
+        """ Swap the edges of the augmenting path through the edge k. """
+        v, w, _ = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = in_blossom[s]
+                if bs >= vertex_count:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if label_end[bs] == -1:
+                    break
+                t = endpoint[label_end[bs]]
+                bt = in_blossom[t]
+                s = endpoint[label_end[bt]]
+                j = endpoint[label_end[bt] ^ 1]
+                if bt >= vertex_count:
+                    augment_blossom(bt, j)
+                mate[j] = label_end[bt]
+                p = label_end[bt] ^ 1
+
+    if warm_start:
+        for k, (i, j, weight) in enumerate(edges):
+            if weight == max_weight and mate[i] == -1 and mate[j] == -1 \
+                    and i != j:
+                mate[i] = 2 * k + 1
+                mate[j] = 2 * k
+
+    # each stage augments the matching by one edge, or ends the search
+    for _ in range(vertex_count):
+        label[:] = (2 * vertex_count) * [0]
+        best_edge[:] = (2 * vertex_count) * [-1]
+        blossom_best_edges[vertex_count:] = vertex_count * [None]
+        allowed_edge[:] = edge_count * [False]
+        queue[:] = []
+        for v in range(vertex_count):
+            if mate[v] == -1 and label[in_blossom[v]] == 0:
+                assign_label(v, 1, -1)
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbour_ends[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if in_blossom[v] == in_blossom[w]:
+                        continue
+                    if not allowed_edge[k]:
+                        k_slack = slack(k)
+                        if k_slack <= 0:
+                            allowed_edge[k] = True
+                    if allowed_edge[k]:
+                        if label[in_blossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[in_blossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            label_end[w] = p ^ 1
+                    elif label[in_blossom[w]] == 1:
+                        b = in_blossom[v]
+                        if best_edge[b] == -1 or k_slack < slack(best_edge[b]):
+                            best_edge[b] = k
+                    elif label[w] == 0:
+                        if best_edge[w] == -1 or k_slack < slack(best_edge[w]):
+                            best_edge[w] = k
+            if augmented:
+                break
+
+            # no augmenting path with the tight edges, update the duals:
+            # 1 a vertex dual reaches 0, 2 an edge S-free becomes tight,
+            # 3 an edge S-S becomes tight, 4 a T-blossom dual reaches 0
+            delta_type = -1
+            delta = delta_edge = delta_blossom = None
+            if not max_cardinality:
+                delta_type = 1
+                delta = min(dual[:vertex_count])
+            for v in range(vertex_count):
+                if label[in_blossom[v]] == 0 and best_edge[v] != -1:
+                    d = slack(best_edge[v])
+                    if delta_type == -1 or d < delta:
+                        delta, delta_type, delta_edge = d, 2, best_edge[v]
+            for b in range(2 * vertex_count):
+                if (blossom_parent[b] == -1 and label[b] == 1
+                        and best_edge[b] != -1):
+                    d = slack(best_edge[b]) // 2
+                    if delta_type == -1 or d < delta:
+                        delta, delta_type, delta_edge = d, 3, best_edge[b]
+            for b in range(vertex_count, 2 * vertex_count):
+                if (blossom_base[b] >= 0 and blossom_parent[b] == -1
+                        and label[b] == 2
+                        and (delta_type == -1 or dual[b] < delta)):
+                    delta, delta_type, delta_blossom = dual[b], 4, b
+            if delta_type == -1:
+                # maximum cardinality reached, end with a last update
+                delta_type = 1
+                delta = max(0, min(dual[:vertex_count]))
+
+            for v in range(vertex_count):
+                if label[in_blossom[v]] == 1:
+                    dual[v] -= delta
+                elif label[in_blossom[v]] == 2:
+                    dual[v] += delta
+            for b in range(vertex_count, 2 * vertex_count):
+                if blossom_base[b] >= 0 and blossom_parent[b] == -1:
+                    if label[b] == 1:
+                        dual[b] += delta
+                    elif label[b] == 2:
+                        dual[b] -= delta
+
+            if delta_type == 1:
+                break
+            elif delta_type == 2:
+                allowed_edge[delta_edge] = True
+                i, j, _ = edges[delta_edge]
+                if label[in_blossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif delta_type == 3:
+                allowed_edge[delta_edge] = True
+                i, j, _ = edges[delta_edge]
+                queue.append(i)
+            else:
+                expand_blossom(delta_blossom, False)
+
+        if not augmented:
+            break
+        # S-blossoms with a null dual are expanded at the end of a stage
+        for b in range(vertex_count, 2 * vertex_count):
+            if (blossom_parent[b] == -1 and blossom_base[b] >= 0
+                    and label[b] == 1 and dual[b] == 0):
+                expand_blossom(b, True)
+
+    return Matching([endpoint[p] if p >= 0 else -1 for p in mate], dual,
+                    blossom_parent,
+                    [label[in_blossom[v]] for v in range(vertex_count)],
+                    in_blossom)
@@ -1,6 +1,11 @@
+import base64
 import random
-import copy
-from typing import List, Set, Tuple, Dict
+import time
+import zlib
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional,
+                    Set, Tuple)
+from models.matching import Matching, max_weight_matching
+from models.software_id import SoftwareId
 
 
 class Pairing:
@@ -13,46 +18,78 @@ class Pairing:
     Two priorities arise:
         1 - No repeat of a pairing
         2 - Try to pitch the players with better scores against each others
+    The rounds of the circle are numbered from 1 to n - 1 and computed from
+    the initial configuration when they are needed. The round in which two
+    players meet is computed from their initial positions, and the rounds
+    already used are kept as the bits of an integer.
+    The initial positions also index the played pairs, one integer per
+    player used as a row of bits, saved with the tournament (get_memory).
+    The rounds after the first one can also be paired as a maximum weight
+    matching of the unplayed pairs (method 'matching'), which lets every
+    player meet an opponent of the closest possible score, or by a search
+    of the score groups bounded in time (method 'search').
     """
+    CIRCLE = 'circle'
+    MATCHING = 'matching'
+    SEARCH = 'search'
+    METHODS = (CIRCLE, MATCHING, SEARCH)
+    # opponents linked to each player in the graph of the matching, doubled
+    # until every player who can be paired is
+    MATCHING_NEIGHBOURS = 8
+    # seconds given to the search by default, and nodes explored between
+    # two checks of the clock
+    SEARCH_TIME_BUDGET = 1.0
+    SEARCH_CLOCK_INTERVAL = 64
+
     def __init__(self,
                  list_of_players: List[str],
                  new_pairing: bool = True):
         """
         Initialize a new instance of Pairing
-        :param list_of_players: ['p_1', 'p_2', 'p_4' ...]
+        :param list_of_players: ['p_1', 'p_2', 'p_4' ...] as SoftwareId
         :param new_pairing: If True, it will randomize the first round.
         For a reload, it must be False because, the 'initial configuration'
         will be used as a reference to recreate the others configurations.
         """
-        self.list_of_players = list_of_players
-        self.possibles_configurations: List[Set[Tuple[str, str]]] = []
-        self.played_matches: Set[Tuple[str, str]] = set()
+        self.list_of_players = [SoftwareId.parse(player_id)
+                                for player_id in list_of_players]
+        # initial position of each player, and bit k set once the round k
+        # of the circle has been used or contains a played match
+        self.positions: Dict[SoftwareId, int] = {}
+        self.consumed_rounds = 0
+        # bit j of played[i] set once the players at the initial positions i
+        # and j have been paired
+        self.played: List[int] = []
+        # statistics of the last search, see generate_next_round_by_search()
+        self.search_stats: Dict[str, object] = {}
         if new_pairing:
             self.initial_configuration = self.randomize_players()
             self.generate_circle_configurations()
 
     @staticmethod
     def get_player_number(player_id):
-        return int(player_id.split('_')[1])
+        return SoftwareId.parse(player_id).number
 
     def randomize_players(self) -> Tuple[str, ...]:
         shuffled_list = self.list_of_players.copy()
         random.shuffle(shuffled_list)
         return tuple(shuffled_list)
 
-    @staticmethod
-    def rearrange_list(old_list: List[str]) -> List[str]:
+    def get_circle_configuration(self, circle_round: int) -> List[str]:
         """
-        This method will create the next circle configuration from the current
-        configuration.
-        It will move the position as it's explained here:
-        https://en.wikipedia.org/wiki/Round-robin_tournament
-        :return new_list: a list where the position are modified
-        [i[0], i[-1], i[1], i[2] ... i[-2]]
+        Compute the circle configuration of a round from the initial
+        configuration, in O(n). Each round moves the positions as it's
+        explained here: https://en.wikipedia.org/wiki/Round-robin_tournament
+        [i[0], i[-1], i[1], i[2] ... i[-2]], so after k rounds position p > 0
+        holds the player initially at 1 + ((p - 1 - k) mod (n - 1)).
+        :param circle_round: from 1 to n - 1, the last round is the initial
+        configuration
+        :return: the players in their positions for this round
         """
-        new_list = [old_list[0], old_list[-1]]
-        new_list.extend(old_list[1:-1])
-        return new_list
+        initial = self.initial_configuration
+        size = len(initial) - 1
+        return [initial[0]] + [initial[1 + (position - circle_round) % size]
+                               for position in range(size)]
 
     def generate_pairing(self, list_configuration: List[str]) -> (
             Set)[Tuple[str, str]]:
@@ -69,31 +106,121 @@ class Pairing:
         """
         set_configuration = set()
         for i in range(int(len(list_configuration) / 2)):
-            pair = [list_configuration[i], list_configuration[-i-1]]
-            pair = tuple(sorted(pair, key=self.get_player_number))
+            # SoftwareId are sorted by number
+            pair = tuple(sorted([list_configuration[i],
+                                 list_configuration[-i-1]]))
             set_configuration.add(pair)
         return set_configuration
 
+    def get_round_configuration(self, circle_round: int) -> (
+            Set)[Tuple[str, str]]:
+        """
+        :param circle_round: from 1 to n - 1
+        :return: the pairs of a round of the circle
+        """
+        return self.generate_pairing(
+            self.get_circle_configuration(circle_round))
+
     def generate_circle_configurations(self):
         """
-        Generate every possibles configurations from an initial list
-        It creates a list of set of tuples.
+        Index the initial positions of the players and make every round of
+        the circle available, from 1 to n - 1. The configurations themselves
+        are computed when they are needed.
         """
-        current_configuration = list(copy.deepcopy(self.initial_configuration))
-        i = 1
-        while i < len(self.initial_configuration):
-            current_configuration = self.rearrange_list(current_configuration)
-            current_set = self.generate_pairing(current_configuration)
-            self.possibles_configurations.append(current_set)
-            i += 1
+        self.positions = {player_id: position for position, player_id
+                          in enumerate(self.initial_configuration)}
+        self.consumed_rounds = 0
+        self.played = [0] * len(self.initial_configuration)
 
-    def add_to_memory(self, round_matches: Set[Tuple[str, str]]):
+    def is_round_available(self, circle_round: int) -> bool:
+        return not self.consumed_rounds >> circle_round & 1
+
+    def consume_round(self, circle_round: int) -> Set[Tuple[str, str]]:
         """
-        Add played match (tuple) to a Set that is used as memory.
-        :param round_matches: ('p_1', 'p_2')
+        Mark a round of the circle as used and add its pairs to memory.
+        :return: the pairs of the round
+        """
+        self.consumed_rounds |= 1 << circle_round
+        configuration = self.get_round_configuration(circle_round)
+        self.add_to_memory(configuration)
+        return configuration
+
+    def get_rounds_of_match(self, match: Tuple[str, str]) -> List[int]:
+        """
+        Compute the rounds of the circle in which two players meet, from
+        their initial positions a < b. With m = n - 1, the player at
+        position 0 meets b in the round k = -b (mod m); otherwise both
+        players move and meet when 2k = -(a + b) (mod m), which has two
+        solutions when n is odd.
+        :param match: ('p_1', 'p_6')
+        :return: the rounds in ascending order, [] if a player isn't in the
+        circle
+        """
+        size = len(self.initial_configuration) - 1
+        positions = sorted(self.positions.get(player_id, -1)
+                           for player_id in match)
+        first, second = positions
+        if first < 0 or first == second:
+            return []
+        if first == 0:
+            rounds = [-second % size]
+        else:
+            target = -(first + second) % size
+            if size % 2:
+                rounds = [target * (size + 1) // 2 % size]
+            elif target % 2:
+                rounds = []
+            else:
+                rounds = [target // 2, target // 2 + size // 2]
+        # the round 0 of the rotation is the round n - 1
+        return sorted(circle_round or size for circle_round in rounds)
+
+    def add_to_memory(self, round_matches: Iterable[Tuple[str, str]]):
+        """
+        Mark the pairs as played. Players outside of the circle are ignored,
+        the circle never pairs them.
+        :param round_matches: [('p_1', 'p_2'), ...]
         """
         for match in round_matches:
-            self.played_matches.add(match)
+            first, second = (self.positions.get(player_id)
+                             for player_id in match)
+            if first is not None and second is not None:
+                self.played[first] |= 1 << second
+                self.played[second] |= 1 << first
+
+    def has_played(self, first_id: str, second_id: str) -> bool:
+        first = self.positions.get(first_id)
+        second = self.positions.get(second_id)
+        if first is None or second is None:
+            return False
+        return bool(self.played[first] >> second & 1)
+
+    def get_memory(self) -> Dict[str, str]:
+        """
+        Compact form of the played pairs and of the used rounds of the
+        circle, saved with the tournament.
+        :return: {'played': rows of bits as bytes, compressed with zlib, in
+        base64, 'rounds': bitmap of the used rounds in hexadecimal}
+        """
+        row_size = (len(self.played) + 7) // 8
+        matrix = b''.join(row.to_bytes(row_size, 'little')
+                          for row in self.played)
+        return {'played': base64.b64encode(zlib.compress(matrix)).decode(),
+                'rounds': format(self.consumed_rounds, 'x')}
+
+    def restore_memory(self, memory: Dict[str, str]):
+        """
+        Restore the played pairs and the used rounds saved by get_memory(),
+        the initial configuration must be the one they were saved with.
+        """
+        row_size = (len(self.played) + 7) // 8
+        matrix = zlib.decompress(base64.b64decode(memory['played']))
+        if len(matrix) != row_size * len(self.played):
+            raise ValueError("The memory doesn't match the configuration")
+        self.played = [int.from_bytes(matrix[start:start + row_size],
+                                      'little')
+                       for start in range(0, len(matrix), row_size)]
+        self.consumed_rounds = int(memory['rounds'], 16)
 
     def generate_first_round_configuration(self) -> Set[Tuple[str, str]]:
         """
@@ -103,24 +230,23 @@ class Pairing:
 
         :return matches: {('p_6', 'p_8'),('p_3', 'p_5'), ...}
         """
-        matches = self.possibles_configurations.pop()
-        self.add_to_memory(matches)
-        return matches
+        for circle_round in range(len(self.initial_configuration) - 1, 0, -1):
+            if self.is_round_available(circle_round):
+                return self.consume_round(circle_round)
+        raise IndexError("Every round of the circle has been used")
 
     def generate_round_configuration_from_match(self, match: Tuple[str, str]) \
             -> Set[Tuple[str, str]]:
         """
-        Search into the possibles configurations, the set of matches that
-        contains the 'match'
+        Find the first available round of the circle that contains the
+        'match'
         :param match: ('p_1', 'p_6')
         :return next_round_configuration: {('p_6', 'p_8'),('p_3', 'p_5'), ...}
+        None if no available round contains the match
         """
-        for configuration in self.possibles_configurations:
-            if match in configuration:
-                next_round_configuration = configuration
-                self.possibles_configurations.remove(configuration)
-                self.add_to_memory(next_round_configuration)
-                return next_round_configuration
+        for circle_round in self.get_rounds_of_match(match):
+            if self.is_round_available(circle_round):
+                return self.consume_round(circle_round)
 
     def try_to_generate_next_round(self, list_of_players: List[str]) -> (
             Set)[Tuple[str, str]]:
@@ -133,28 +259,44 @@ class Pairing:
         :return next_round: {('p_6', 'p_8'),('p_3', 'p_5'), ...} The
         configuration for next round
         """
+        positions = [self.positions.get(player_id)
+                     for player_id in list_of_players]
         for i in range(len(list_of_players)):
+            played = 0 if positions[i] is None else self.played[positions[i]]
             for j in range(i+1, len(list_of_players)):
-                match_test = [list_of_players[i], list_of_players[j]]
-                match_test = tuple(sorted(match_test,
-                                          key=self.get_player_number))
-                if match_test not in self.played_matches:
+                if positions[j] is None or not played >> positions[j] & 1:
+                    match_test = tuple(sorted([list_of_players[i],
+                                               list_of_players[j]]))
                     next_round = self.generate_round_configuration_from_match(
                         match_test)
                     return next_round
 
     def generate_next_round_from_ranking(self,
-                                         dict_ranking: Dict[str, List[str]]):
+                                         dict_ranking: Dict[str, List[str]],
+                                         method: str = CIRCLE,
+                                         time_budget: Optional[float] = None):
         """
         Use the actual ranking in a tournament to create the next matches.
         The Key represents the rank of the players and the value the list of
         Players with that rank.
         :param dict_ranking: {'1':['p_3'], '2':['p_1', 'p_4'], '3':...}
+        :param method: 'circle' for a round of the circle, 'matching' for a
+        maximum weight matching, see generate_next_round_by_matching(),
+        'search' for generate_next_round_by_search()
+        :param time_budget: seconds given to the search, SEARCH_TIME_BUDGET
+        if None
         :return result: {('p_1', 'p_3'),('p_4', 'p_5'), ...} The configuration
         for next round
         this method will always try to look for matches that haven't been
         played yet.
         """
+        if method == self.MATCHING:
+            return self.generate_next_round_by_matching(dict_ranking)
+        if method == self.SEARCH:
+            return self.generate_next_round_by_search(dict_ranking,
+                                                      time_budget)
+        if method != self.CIRCLE:
+            raise ValueError(f"Unknown pairing method {method!r}")
         ranking_key = sorted(dict_ranking.keys(), key=int)
         accumulated_list = []
         result = None
@@ -165,6 +307,370 @@ class Pairing:
             i += 1
         return result
 
+    def get_matching_edges(self, list_of_players: List[str],
+                           groups: List[int], neighbours: int) -> (
+            List)[Tuple[int, int, int]]:
+        """
+        Link each player to the next unplayed opponents in the ranking. The
+        weight of a pair decreases with the square of the distance between
+        the score groups of the players, the pairs of a same group weigh
+        the most.
+        :param list_of_players: players sorted by ranking
+        :param groups: index of the score group of each player
+        :param neighbours: opponents linked to each player
+        :return: [(i, j, weight), ...] with i < j indexes in list_of_players
+        """
+        highest_weight = len(set(groups)) ** 2 + 1
+        positions = [self.positions.get(player_id)
+                     for player_id in list_of_players]
+        edges = []
+        for i in range(len(list_of_players)):
+            played = 0 if positions[i] is None else self.played[positions[i]]
+            linked = 0
+            for j in range(i + 1, len(list_of_players)):
+                if linked == neighbours:
+                    break
+                if positions[j] is None or not played >> positions[j] & 1:
+                    edges.append((i, j, highest_weight
+                                  - (groups[j] - groups[i]) ** 2))
+                    linked += 1
+        return edges
+
+    def get_single_edges(self, list_of_players: List[str],
+                         groups: List[int], singles: Iterable[int]) -> (
+            List)[Tuple[int, int, int]]:
+        """
+        Link players left single by the matching to every unplayed
+        opponent, with the weights of get_matching_edges().
+        :param singles: indexes of the players in list_of_players
+        :return: [(i, j, weight), ...] with i < j indexes in list_of_players
+        """
+        highest_weight = len(set(groups)) ** 2 + 1
+        positions = [self.positions.get(player_id)
+                     for player_id in list_of_players]
+        edges = []
+        for i in singles:
+            played = 0 if positions[i] is None else self.played[positions[i]]
+            for j in range(len(list_of_players)):
+                if j != i and (positions[j] is None
+                               or not played >> positions[j] & 1):
+                    edges.append((min(i, j), max(i, j), highest_weight
+                                  - (groups[j] - groups[i]) ** 2))
+        return edges
+
+    def get_improving_pairs(self, list_of_players: List[str],
+                            groups: List[int], matching: Matching) -> (
+            List)[Tuple[int, int, int]]:
+        """
+        Find the unplayed pairs that could improve the matching, their
+        reduced cost under the final duals is negative. They are missing
+        from the graph, the pairs of the graph never have one.
+        :return: [(i, j, weight), ...] the pairs to add to the graph
+        """
+        highest_weight = len(set(groups)) ** 2 + 1
+        improving = matching.find_improving_pairs(
+            groups, lambda first, second: (highest_weight
+                                           - (first - second) ** 2),
+            self.get_played_test(list_of_players))
+        return [(i, j, weight) for (i, j), weight in improving.items()]
+
+    def get_played_test(self, list_of_players: List[str]
+                        ) -> Callable[[int, int], bool]:
+        """
+        :return: is_played(i, j) if the players of indexes i and j in
+        list_of_players have already met
+        """
+        positions = [self.positions.get(player_id)
+                     for player_id in list_of_players]
+
+        def is_played(i, j):
+            return (positions[i] is not None and positions[j] is not None
+                    and bool(self.played[positions[i]] >> positions[j] & 1))
+        return is_played
+
+    def generate_next_round_by_matching(self,
+                                        dict_ranking: Dict[str, List[str]]
+                                        ) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Pair the next round as a maximum weight matching of the unplayed
+        pairs: as many players as possible are paired, then the sum of the
+        squared score differences of the pairs is the lowest possible.
+        The graph only links each player to its nearest opponents in the
+        ranking: the players left single are linked to every opponent, then
+        every unplayed pair is used if the matching can't be proved of
+        maximum cardinality, and the pairs that could still improve the
+        matching are added until none is left, so the result is the same
+        as with every unplayed pair. The pairs of a same score group are
+        matched greedily in the order of the ranking before the blossom
+        algorithm runs, so the best players still meet each other first.
+        The rounds of the circle containing the pairs are marked as used.
+        :param dict_ranking: {'1':['p_3'], '2':['p_1', 'p_4'], '3':...}
+        :return: {('p_1', 'p_3'),('p_4', 'p_5'), ...}, None if every pair
+        has already been played
+        """
+        ranking_key = sorted(dict_ranking.keys(), key=int)
+        list_of_players = [SoftwareId.parse(player_id) for key in ranking_key
+                           for player_id in dict_ranking[key]]
+        groups = [group for group, key in enumerate(ranking_key)
+                  for _ in dict_ranking[key]]
+        player_count = len(list_of_players)
+        edges = self.get_matching_edges(list_of_players, groups,
+                                        self.MATCHING_NEIGHBOURS)
+        linked = {(i, j) for i, j, _ in edges}
+        # players linked to every opponent
+        linked_players = set()
+
+        def add_edges(added_edges):
+            """ Add the new pairs to the graph, return False if none. """
+            edge_count = len(edges)
+            for edge in added_edges:
+                if edge[:2] not in linked:
+                    linked.add(edge[:2])
+                    edges.append(edge)
+            return len(edges) > edge_count
+
+        while True:
+            matching = max_weight_matching(edges, max_cardinality=True,
+                                           vertex_count=player_count)
+            pairs = {tuple(sorted([list_of_players[i], list_of_players[j]]))
+                     for i, j in enumerate(matching.mates) if j > i}
+            if len(linked_players) == player_count:
+                break
+            if len(pairs) < player_count // 2:
+                singles = [i for i, j in enumerate(matching.mates)
+                           if j == -1 and i not in linked_players]
+                linked_players.update(singles)
+                if add_edges(self.get_single_edges(list_of_players, groups,
+                                                   singles)):
+                    continue
+                if not matching.is_maximum(
+                        self.get_played_test(list_of_players)):
+                    # the missing pairs are elsewhere, use every pair
+                    linked_players.update(range(player_count))
+                    edges = self.get_matching_edges(
+                        list_of_players, groups, player_count)
+                    continue
+            if not add_edges(self.get_improving_pairs(list_of_players,
+                                                      groups, matching)):
+                break
+        return self.consume_pairs(pairs)
+
+    def consume_pairs(self, pairs: Set[Tuple[str, str]]
+                      ) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Add pairs found outside of the circle to memory and mark the rounds
+        of the circle containing them as used.
+        :return: the pairs, None if there is none
+        """
+        if not pairs:
+            return None
+        self.add_to_memory(pairs)
+        for match in pairs:
+            for circle_round in self.get_rounds_of_match(match):
+                self.consumed_rounds |= 1 << circle_round
+        return pairs
+
+    def get_search_candidates(self, player: int, groups: List[int],
+                              group_ends: List[int], free: List[bool],
+                              free_counts: List[int],
+                              positions: List[Optional[int]]
+                              ) -> Iterator[int]:
+        """
+        Opponents of the highest ranked unpaired player, in the order of
+        the Dutch system: its score group is split in two halves, the
+        player meets the second half first, in order and then transposed,
+        then the first half (exchanges), then the lower groups (the player
+        floats down). -1 last, the player stays unpaired.
+        :param player: index of the player in the ranking
+        :param group_ends: index after the last player of each group
+        :param free: unpaired players
+        :param free_counts: unpaired players in each group
+        :return: iterator of the indexes of the opponents
+        """
+        played = (0 if positions[player] is None
+                  else self.played[positions[player]])
+
+        def can_meet(opponent):
+            return (free[opponent] and (positions[opponent] is None
+                                        or not played >> positions[opponent]
+                                        & 1))
+
+        group = groups[player]
+        members = [opponent for opponent in range(player + 1,
+                                                  group_ends[group])
+                   if free[opponent]]
+        half = free_counts[group] // 2 - 1
+        for opponent in members[half:] + members[:half]:
+            if can_meet(opponent):
+                yield opponent
+        for opponent in range(group_ends[group], len(groups)):
+            if can_meet(opponent):
+                yield opponent
+        yield -1
+
+    @staticmethod
+    def get_float_bound(odd_groups: Tuple[int, ...], skip: bool) -> int:
+        """
+        Lowest cost of the pairs between groups: a pair at a distance d
+        costs d * d >= d, and the pairs must make even the number of players
+        of each group, which costs at least the distances between the odd
+        groups paired in order. A player left unpaired removes one of the
+        odd groups of even index, the others never cost less.
+        :param odd_groups: groups with an odd number of players, sorted
+        :param skip: one player can be left unpaired
+        """
+        gaps = [second - first
+                for first, second in zip(odd_groups, odd_groups[1:])]
+        if not skip:
+            return sum(gaps[::2])
+        return min(sum(gaps[:index:2]) + sum(gaps[index + 1::2])
+                   for index in range(0, len(odd_groups), 2))
+
+    def generate_next_round_by_search(self,
+                                      dict_ranking: Dict[str, List[str]],
+                                      time_budget: Optional[float] = None
+                                      ) -> Optional[Set[Tuple[str, str]]]:
+        """
+        Pair the next round with a depth-first search of the score groups:
+        the highest ranked unpaired player is paired first, with its
+        opponents in the order of get_search_candidates(), so the first
+        pairing found is the one of the Dutch system when it is valid.
+        The cost of a pairing is the number of unpaired players, then the
+        sum of the squared distances between the score groups of the pairs,
+        as for the matching. A branch is cut when its cost and a bound of
+        the cost left, from the groups with an odd number of unpaired
+        players (get_float_bound()), can't beat the best pairing found.
+        Only a pairing leaving at most one player unpaired, when their
+        number is odd, is accepted. The search stops once the time budget
+        is spent, or once the best pairing reaches the bound, and returns
+        the best pairing found; the maximum weight matching is used if no
+        pairing was found in time, or if there is none.
+        search_stats reports the nodes explored, the solutions found, the
+        best cost (unpaired players, squared distances), the seconds to the
+        first solution and in total, whether the search was complete and
+        whether the matching was used.
+        :param dict_ranking: {'1':['p_3'], '2':['p_1', 'p_4'], '3':...}
+        :param time_budget: seconds, SEARCH_TIME_BUDGET if None
+        :return: {('p_1', 'p_3'),('p_4', 'p_5'), ...}, None if every pair
+        has already been played
+        """
+        start = time.monotonic()
+        deadline = start + (self.SEARCH_TIME_BUDGET if time_budget is None
+                            else time_budget)
+        ranking_key = sorted(dict_ranking.keys(), key=int)
+        list_of_players = [SoftwareId.parse(player_id) for key in ranking_key
+                           for player_id in dict_ranking[key]]
+        groups = [group for group, key in enumerate(ranking_key)
+                  for _ in dict_ranking[key]]
+        group_ends = []
+        for key in ranking_key:
+            group_ends.append((group_ends[-1] if group_ends else 0)
+                              + len(dict_ranking[key]))
+        positions = [self.positions.get(player_id)
+                     for player_id in list_of_players]
+        player_count = len(list_of_players)
+        free = [True] * player_count
+        free_counts = [len(dict_ranking[key]) for key in ranking_key]
+        # bit g set while the group g has an odd number of unpaired players
+        odd_groups = sum(1 << group for group, count
+                         in enumerate(free_counts) if count % 2)
+        float_bounds: Dict[int, int] = {}
+        free_total = player_count
+        unpaired = distance = 0
+        chosen: List[Tuple[int, int]] = []
+        best: Optional[List[Tuple[int, int]]] = None
+        # only the odd player can be left unpaired, else the matching is
+        # used
+        best_cost = (player_count % 2 + 1, 0)
+
+        def get_bound():
+            bound = float_bounds.get(odd_groups)
+            if bound is None:
+                bound = float_bounds[odd_groups] = self.get_float_bound(
+                    tuple(group for group in range(len(free_counts))
+                          if odd_groups >> group & 1), free_total % 2 == 1)
+            return unpaired + free_total % 2, distance + bound
+
+        root_bound = get_bound()
+        stats = {'nodes': 0, 'solutions': 0, 'best_cost': None,
+                 'first_solution': None, 'elapsed': 0.0,
+                 'complete': False, 'fallback': False}
+
+        def toggle(player, taken):
+            nonlocal odd_groups, free_total
+            free[player] = not taken
+            group = groups[player]
+            free_counts[group] += -1 if taken else 1
+            odd_groups ^= 1 << group
+            free_total += -1 if taken else 1
+
+        def choose(player, opponent, taken):
+            """ Pair a player with an opponent (-1: unpaired), or undo. """
+            nonlocal unpaired, distance
+            sign = 1 if taken else -1
+            toggle(player, taken)
+            if opponent == -1:
+                unpaired += sign
+            else:
+                toggle(opponent, taken)
+                distance += sign * (groups[opponent] - groups[player]) ** 2
+
+        # frames [player, candidates, opponent chosen or None]
+        frames = [[0, self.get_search_candidates(
+            0, groups, group_ends, free, free_counts, positions), None]
+                  ] if player_count else []
+        while frames:
+            frame = frames[-1]
+            if frame[2] is not None:
+                choose(frame[0], frame[2], False)
+                chosen.pop()
+                frame[2] = None
+            opponent = next(frame[1], None)
+            if opponent is None:
+                frames.pop()
+                continue
+            stats['nodes'] += 1
+            if (stats['nodes'] % self.SEARCH_CLOCK_INTERVAL == 0
+                    and time.monotonic() > deadline):
+                break
+            frame[2] = opponent
+            choose(frame[0], opponent, True)
+            chosen.append((frame[0], opponent))
+            if get_bound() >= best_cost:
+                continue
+            player = next((player for player
+                           in range(frame[0] + 1, player_count)
+                           if free[player]), None)
+            if player is not None:
+                frames.append([player, self.get_search_candidates(
+                    player, groups, group_ends, free, free_counts,
+                    positions), None])
+                continue
+            best, best_cost = list(chosen), (unpaired, distance)
+            stats['solutions'] += 1
+            if stats['first_solution'] is None:
+                stats['first_solution'] = time.monotonic() - start
+            if best_cost == root_bound or time.monotonic() > deadline:
+                break
+        else:
+            stats['complete'] = True
+        if best_cost == root_bound:
+            stats['complete'] = True
+
+        if best is None:
+            pairs = None if player_count else set()
+        else:
+            stats['best_cost'] = best_cost
+            pairs = {tuple(sorted([list_of_players[player],
+                                   list_of_players[opponent]]))
+                     for player, opponent in best if opponent != -1}
+        stats['elapsed'] = time.monotonic() - start
+        self.search_stats = stats
+        if pairs is None:
+            stats['fallback'] = True
+            return self.generate_next_round_by_matching(dict_ranking)
+        return self.consume_pairs(pairs)
+
     @classmethod
     def instantiate_pairing(cls,
                             list_of_players: List[str],
@@ -172,8 +678,8 @@ class Pairing:
                             list_played_matches: List[Tuple[str, str]]):
         """
         Instantiate a Pairing object from the initial configuration of a list
-        and remove the configurations that contains matches that already
-        happened during the tournament.
+        and mark as used the rounds of the circle that contain matches that
+        already happened during the tournament.
 
         :param list_of_players: ['p_1', 'p_2', 'p_4', 'p_8']
         :param initial_configuration: (['p_4', 'p_2', 'p_1', 'p_8'])
@@ -182,10 +688,11 @@ class Pairing:
         """
         instance = cls(list_of_players=list_of_players,
                        new_pairing=False)
-        instance.initial_configuration = initial_configuration
+        instance.initial_configuration = tuple(
+            SoftwareId.parse(player_id) for player_id in initial_configuration)
         instance.generate_circle_configurations()
-        instance.played_matches.update(list_played_matches)
-        instance.possibles_configurations = \
-            [config for config in instance.possibles_configurations
-             if not config & instance.played_matches]
+        instance.add_to_memory(list_played_matches)
+        for match in list_played_matches:
+            for circle_round in instance.get_rounds_of_match(match):
+                instance.consumed_rounds |= 1 << circle_round
         return instance
@@ -1,14 +1,25 @@
 from models.base_model import _BaseModel
-from typing import Dict
+from typing import Dict, Optional
 
 
 class Player(_BaseModel):
+    """
+    Players are shared: from_json() returns the same instance for an ID to
+    every tournament, match and screen.
+    A player is immutable, it can only be changed with update(), which
+    changes the shared instance and saves it. When the players are
+    modified outside the application, the shared instances are updated in
+    place from the new records, and removed players are dropped.
+    """
+    __slots__ = ('last_name', 'first_name', 'date_of_birth', 'chess_id')
+
     def __init__(self,
                  last_name: str,
                  first_name: str,
                  date_of_birth: str,
                  chess_id: str,
-                 save_to_db: bool = True):
+                 save_to_db: bool = True,
+                 software_id: Optional[str] = None):
         """
         Initialize a new player object.
         :param last_name:
@@ -16,15 +27,66 @@ class Player(_BaseModel):
         :param date_of_birth: format must follow 'YYYY-MM-DD'
         :param chess_id: format must follow 'AA00000'
         :param save_to_db: If true, it wills save the object into the database
+        :param software_id: ID loaded from the database or reserved
         """
-        super().__init__()
-        self.last_name = last_name.capitalize()
-        self.first_name = first_name.capitalize()
-        self.date_of_birth = date_of_birth
-        self.chess_id = chess_id.upper()
+        super().__init__(software_id)
+        self._set_fields(last_name, first_name, date_of_birth, chess_id)
         if save_to_db:
             self.save_to_database()
 
+    def __setattr__(self, name, value):
+        if name not in _BaseModel.__slots__:
+            raise AttributeError("Player is immutable, use Player.update()")
+        super().__setattr__(name, value)
+
+    def _set_fields(self, last_name: str, first_name: str,
+                    date_of_birth: str, chess_id: str):
+        object.__setattr__(self, 'last_name', last_name.capitalize())
+        object.__setattr__(self, 'first_name', first_name.capitalize())
+        object.__setattr__(self, 'date_of_birth', date_of_birth)
+        object.__setattr__(self, 'chess_id', chess_id.upper())
+
+    def update(self, **fields: str) -> 'Player':
+        """
+        Change fields of the player and save it, the change is seen by
+        every tournament sharing the player.
+        :param fields: last_name, first_name, date_of_birth or chess_id
+        :return: the player
+        """
+        unknown = fields.keys() - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"Unknown player fields: {sorted(unknown)}")
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values.update(fields)
+        self._set_fields(**values)
+        self.save_to_database()
+        return self
+
+    @classmethod
+    def _refresh_instances(cls, instances: Dict[str, 'Player']
+                           ) -> Dict[str, 'Player']:
+        """
+        Update the shared players in place from the modified records, so
+        that no tournament keeps an outdated player. A player whose record
+        is missing or can't be read is dropped from the identity map, and
+        built again by the next from_json().
+        """
+        records = cls.get_storage().get_many(
+            cls.class_name_plural(),
+            [str(software_id) for software_id in instances])
+        for software_id, player in list(instances.items()):
+            record = records.get(str(software_id))
+            try:
+                player._set_fields(last_name=record["last_name"],
+                                   first_name=record["first_name"],
+                                   date_of_birth=record["date_of_birth"],
+                                   chess_id=record["chess_id"])
+            except (TypeError, KeyError, AttributeError):
+                del instances[software_id]
+                continue
+            player._saved_record = record
+        return instances
+
     @classmethod
     def _create_instance_from_json(cls,
                                    item_data: Dict[str, str],
@@ -43,9 +105,9 @@ class Player(_BaseModel):
             first_name=item_data["first_name"],
             date_of_birth=item_data["date_of_birth"],
             chess_id=item_data["chess_id"],
-            save_to_db=False
+            save_to_db=False,
+            software_id=player_id
         )
-        instance.software_id = player_id
         return instance
 
     def _prepare_data_to_save(self) -> Dict[str, str]:
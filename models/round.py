@@ -1,14 +1,24 @@
 from datetime import datetime
 from models.base_model import _BaseModel
 from models.match import Match
-from typing import Dict, Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 
 class Round(_BaseModel):
+    """
+    Matches are indexed by ID and by player when they are loaded or
+    created, they must be set with the matches property or created with
+    create_matches().
+    """
+    __slots__ = ('name', 'time_start', 'time_end', 'is_finished',
+                 'matches_pairs', '_match_ids', '_matches',
+                 '_matches_by_id', '_matches_by_player')
+
     def __init__(self,
                  name: str,
                  matches_pairs: Optional[Set[Tuple[str, str]]] = None,
-                 save_to_db: bool = True):
+                 save_to_db: bool = True,
+                 software_id: Optional[str] = None):
         """
         Initialise a new instance of a Round
 
@@ -19,18 +29,54 @@ class Round(_BaseModel):
          2024/09/14 : As of today, the pair are generated by an instance of
          pairing model
         :param save_to_db: If true, it wills save the object into the database
+        :param software_id: ID loaded from the database or reserved
         """
-        super().__init__()
+        super().__init__(software_id)
         self.name = name
         self.time_start = None
         self.time_end = None
         self.is_finished = False
+        self._match_ids: List[str] = []
         self.matches = []
-        if matches_pairs:
-            self.matches_pairs = matches_pairs
-            self.create_matches()
-        if save_to_db:
-            self.save_to_database()
+        with self.batch():
+            if matches_pairs:
+                self.matches_pairs = matches_pairs
+                self.create_matches()
+            if save_to_db:
+                self.save_to_database()
+
+    @property
+    def matches(self) -> List[Match]:
+        """ Matches of the round, read from the database on first access. """
+        if self._matches is None:
+            self.load_matches()
+        return self._matches
+
+    @matches.setter
+    def matches(self, matches: Optional[List[Match]]):
+        self._matches = matches
+        self._index_matches()
+
+    def load_matches(self):
+        """ Read the matches of a round loaded from the database. """
+        self.matches = Match.from_json_many(self._match_ids)
+
+    def _index_matches(self):
+        """ Index the loaded matches by ID and by player. """
+        if self._matches is None:
+            self._matches_by_id = self._matches_by_player = None
+            return
+        self._matches_by_id = {match.software_id: match
+                               for match in self._matches}
+        self._matches_by_player = {player_id: match
+                                   for match in self._matches
+                                   for player_id in match.players}
+
+    def get_match_ids(self) -> List[str]:
+        """ IDs of the matches, without reading the matches not loaded yet. """
+        if self._matches is None:
+            return self._match_ids
+        return [match.software_id for match in self._matches]
 
     def start_round(self):
         """ Method to save the time when round start. """
@@ -44,7 +90,8 @@ class Round(_BaseModel):
                                    save_to_db: bool = False):
         """
         Create a round object from a json dictionary.
-        Instantiate matches from their corresponding id found in the database
+        Matches are instantiated from their IDs on first access to
+        self.matches
         :param item_data:
         :param round_id:
         :param save_to_db: must be false to avoid copy of round instance in
@@ -52,13 +99,13 @@ class Round(_BaseModel):
         :return: An instance of Player
         """
         instance = cls(name=item_data["name"],
-                       save_to_db=False)
-        instance.software_id = round_id
+                       save_to_db=False,
+                       software_id=round_id)
         instance.time_start = item_data["time_start"]
         instance.time_end = item_data["time_end"]
         instance.is_finished = item_data["complete"]
-        instance.matches = [Match.from_json(match_id) for match_id
-                            in item_data["matches"]]
+        instance._match_ids = item_data["matches"]
+        instance.matches = None
         return instance
 
     def _prepare_data_to_save(self) -> dict:
@@ -71,17 +118,22 @@ class Round(_BaseModel):
             "time_start": self.time_start,
             "time_end": self.time_end,
             "complete": self.is_finished,
-            "matches": [match.software_id for match in self.matches]
+            "matches": [str(match_id) for match_id in self.get_match_ids()]
         }
         return data
 
     def create_matches(self):
         """
         Create Match Instance from pairs of players.
+        The IDs are reserved in one block and the matches written at once.
         :return:
         """
-        self.matches.extend([Match(pair[0], pair[1]) for pair
-                             in self.matches_pairs])
+        match_ids = Match.reserve_software_ids(len(self.matches_pairs))
+        with self.batch():
+            self.matches.extend([Match(pair[0], pair[1], software_id=match_id)
+                                 for pair, match_id
+                                 in zip(self.matches_pairs, match_ids)])
+            self._index_matches()
 
     def end_round(self):
         """
@@ -98,11 +150,22 @@ class Round(_BaseModel):
         else:
             raise ValueError("Round is already finished")
 
-    def get_match_by_player_id(self, player_id: str):
+    def get_match_by_player_id(self, player_id: str) -> Optional[Match]:
         """
         Get a Match object in the Round where a Player_id is participating
         :param player_id:
-        :return: Match object
+        :return: Match object, None if the player has no match
+        """
+        if self._matches is None:
+            self.load_matches()
+        return self._matches_by_player.get(player_id)
+
+    def get_match(self, match_id: str) -> Optional[Match]:
+        """
+        Get a Match object of the Round from its ID
+        :param match_id: 'm_<number>'
+        :return: Match object, None if the match isn't in the round
         """
-        return next((match for match in self.matches if player_id
-                     in match.score.keys()), None)
+        if self._matches is None:
+            self.load_matches()
+        return self._matches_by_id.get(match_id)
@@ -0,0 +1,86 @@
+from functools import total_ordering
+from typing import Dict, List, Optional, Union
+
+
+@total_ordering
+class SoftwareId:
+    """
+    Immutable software ID of an instance: the letter of its collection and
+    its number, written '<letter>_<number>' in the database ('p_12').
+    It is equal to its text and has the same hash, so it can be looked up
+    in dictionaries keyed by text, and it is ordered by number.
+    IDs are interned, the same object is returned for the same ID until
+    clear_interned() is called with the identity map of the models.
+    Numbers follow the sequence of each collection, so the interned IDs are
+    kept in a list indexed by number for each letter, IDs far beyond the
+    end of the list are not interned.
+    """
+    __slots__ = ('letter', 'number', '_hash')
+    _interned: Dict[str, List[Optional['SoftwareId']]] = {}
+    MAX_GAP = 4096
+
+    def __init__(self, letter: str, number: int):
+        object.__setattr__(self, 'letter', letter)
+        object.__setattr__(self, 'number', number)
+        object.__setattr__(self, '_hash', hash(f"{letter}_{number}"))
+
+    @classmethod
+    def of(cls, letter: str, number: int) -> 'SoftwareId':
+        """ Return the interned ID of a collection letter and a number. """
+        interned = cls._interned.get(letter)
+        if interned is None:
+            interned = cls._interned[letter] = []
+        if 0 <= number < len(interned):
+            software_id = interned[number]
+            if software_id is None:
+                software_id = interned[number] = cls(letter, number)
+            return software_id
+        software_id = cls(letter, number)
+        if len(interned) <= number <= len(interned) + cls.MAX_GAP:
+            interned.extend([None] * (number - len(interned)))
+            interned.append(software_id)
+        return software_id
+
+    @classmethod
+    def clear_interned(cls):
+        """ Forget the interned IDs, equal IDs are still equal. """
+        cls._interned.clear()
+
+    @classmethod
+    def parse(cls, software_id: Union[str, 'SoftwareId']) -> 'SoftwareId':
+        """
+        Return the interned ID of a text.
+        :param software_id: 'p_12', or a SoftwareId returned as is
+        """
+        if isinstance(software_id, SoftwareId):
+            return software_id
+        letter, number = software_id.split('_')
+        return cls.of(letter, int(number))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SoftwareId is immutable")
+
+    def __reduce__(self):
+        return SoftwareId.of, (self.letter, self.number)
+
+    def __str__(self):
+        return f"{self.letter}_{self.number}"
+
+    def __repr__(self):
+        return f"SoftwareId('{self.letter}_{self.number}')"
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, SoftwareId):
+            return self is other or (self.number == other.number
+                                     and self.letter == other.letter)
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __lt__(self, other):
+        if not isinstance(other, SoftwareId):
+            return NotImplemented
+        return (self.number, self.letter) < (other.number, other.letter)
@@ -0,0 +1,581 @@
+import os.path
+import itertools
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import (Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple)
+from models.json_stream import RecordReader, dump_records
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+# 'none': never fsync, 'batch': fsync the files of a group of writes once,
+# when it is committed, 'write': fsync every file as soon as it is written
+DURABILITY_POLICIES = ('none', 'batch', 'write')
+
+
+def get_file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """
+    :return: (mtime, size) of a file, None if the file doesn't exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_id_number(software_id: str) -> int:
+    return int(software_id.split("_")[1])
+
+
+def fsync_path(path: str):
+    """ Flush a file or a directory from the system cache to the disk. """
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class Storage(ABC):
+    """
+    Abstract storage engine used by _BaseModel to persist the models.
+    A collection ('players', 'matches', ...) is a dictionary of records,
+    the dictionaries built by _prepare_data_to_save, indexed by software ID,
+    with a sequence counter used to allocate new software IDs.
+
+    The engines aren't thread-safe by themselves, code using an engine from
+    several threads must hold its lock.
+    """
+    IMPORT_BATCH_SIZE = 10000
+
+    def __init__(self):
+        self.stats: Dict[str, int] = {'file_reads': 0, 'file_writes': 0}
+        self.lock = threading.RLock()
+
+    @abstractmethod
+    def records(self, collection: str) -> Dict[str, dict]:
+        """
+        Return every record of a collection. The dictionary is shared with
+        the storage, it must not be modified by the caller.
+        :return: {'<software_id>': {...}}
+        """
+        raise NotImplementedError
+
+    def get(self, collection: str, software_id: str) -> Optional[dict]:
+        """
+        :return: the record of a software ID, None if it doesn't exist
+        """
+        return self.records(collection).get(software_id)
+
+    def get_many(self, collection: str,
+                 software_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Read the records of several software IDs at once.
+        :return: {'<software_id>': {...}}, without the IDs that don't exist
+        """
+        records = self.records(collection)
+        return {software_id: records[software_id]
+                for software_id in software_ids if software_id in records}
+
+    def _get_ordered_ids(self, collection: str) -> List[str]:
+        """ Software IDs of a collection, in the order of their numbers. """
+        return sorted(self.records(collection), key=get_id_number)
+
+    def scan(self, collection: str, offset: int = 0,
+             limit: Optional[int] = None,
+             where: Optional[Callable[[str, dict], bool]] = None
+             ) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterate over the records of a collection in the order of their
+        software IDs, without building a copy of the collection.
+        :param offset: number of matching records skipped
+        :param limit: maximum number of records, every record if None
+        :param where: filter called with the software ID and the record,
+        only the records for which it returns True are iterated
+        :return: iterator of ('<software_id>', {...})
+        """
+        records = self.records(collection)
+        matching = ((software_id, records[software_id])
+                    for software_id in self._get_ordered_ids(collection)
+                    if where is None or where(software_id,
+                                              records[software_id]))
+        stop = None if limit is None else offset + limit
+        return itertools.islice(matching, offset, stop)
+
+    def count(self, collection: str) -> int:
+        """ Number of records of a collection. """
+        return len(self.records(collection))
+
+    @abstractmethod
+    def version(self, collection: str) -> int:
+        """
+        Return a number that changes when a collection is modified outside
+        the application, instances built from another version are outdated.
+        """
+        raise NotImplementedError
+
+    def get_modified_time(self, collection: str) -> Optional[int]:
+        """
+        Return the time of the last write of a collection in nanoseconds,
+        read without loading it, None if the engine can't tell.
+        """
+        return None
+
+    @abstractmethod
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        """
+        Reserve a block of software ID numbers, the sequence counter is
+        saved with the next write of the collection.
+        :return: the first number of the block
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_last_id(self, collection: str) -> int:
+        """ Sequence counter of a collection, the last number reserved. """
+        raise NotImplementedError
+
+    @abstractmethod
+    def write(self, collection: str, records: Dict[str, dict]):
+        """
+        Insert or replace records of a collection and persist them.
+        :param records: {'<software_id>': {...}}
+        """
+        raise NotImplementedError
+
+    def prepare_write(self, collection: str,
+                      records: Dict[str, dict]) -> Callable[[], None]:
+        """
+        Split a write in two steps for a background writer: the records are
+        visible to the reads at once, and the returned function, which can
+        run in another thread, persists them.
+        """
+        def persist():
+            with self.lock:
+                self.write(collection, records)
+        return persist
+
+    def commit(self):
+        """
+        End of a group of writes (a _BaseModel.batch() or a single save),
+        used by the engines that make a group durable at once.
+        """
+
+    def flush(self):
+        """
+        Persist the writes delayed by the engine, if any, and return once
+        they are written.
+        """
+
+    def clear_cache(self):
+        """ Forget everything kept in memory, the next reads hit the disk. """
+
+    def import_collection(self, collection: str, path: str):
+        """
+        Load a JSON file using the format of the data directory,
+        {'<collection>': {'<software_id>': {...}}}, into the storage.
+        The file is read incrementally and written IMPORT_BATCH_SIZE
+        records at a time, the sequence counter of the file is kept when it
+        is ahead of the storage.
+        """
+        reader = RecordReader(path, collection)
+        records = {}
+        for software_id, record in reader:
+            if len(records) == self.IMPORT_BATCH_SIZE:
+                self.write(collection, records)
+                records = {}
+            records[software_id] = record
+        self._raise_last_id(collection, reader.values.get('last_id', 0))
+        self.write(collection, records)
+
+    def _raise_last_id(self, collection: str, last_id: int):
+        """
+        Move the sequence counter of a collection up to last_id, it is saved
+        with the next write of the collection.
+        """
+        missing = last_id - self.get_last_id(collection)
+        if missing > 0:
+            self.allocate_ids(collection, missing)
+
+    def export_collection(self, collection: str, path: str):
+        """
+        Save a collection to a JSON file using the format of the data
+        directory, {'<collection>': {'<software_id>': {...}}}. The records
+        are written one by one, in the order of their IDs, followed by the
+        sequence counter.
+        """
+        dump_records(path, collection, self.scan(collection),
+                     self.get_last_id(collection))
+
+
+class _FileStorage(Storage):
+    """
+    Base class of the storage engines using files of the data directory.
+    Each collection is parsed once and kept in memory with the stamp of its
+    files, a change of stamp (manual edit of a file) triggers a new parse,
+    unless a write of the collection is in progress.
+    Writes update the memory first and the files in a second step, see
+    prepare_write(). Whole files are written to a temporary file renamed
+    over the previous one, so a crash never leaves a truncated collection,
+    and are flushed to the disk according to the durability policy.
+    """
+    def __init__(self, data_dir: str = DATA_DIR, durability: str = 'none'):
+        super().__init__()
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Unknown durability policy: {durability}")
+        self.data_dir = data_dir
+        self.durability = durability
+        self.stats['fsyncs'] = 0
+        self._cache: Dict[str, dict] = {}
+        self._unsynced_paths = set()
+
+    def get_path(self, collection: str, extension: str = 'json') -> str:
+        return os.path.join(self.data_dir, f"{collection}.{extension}")
+
+    def _get_paths(self, collection: str) -> List[str]:
+        """ Files of a collection. """
+        return [self.get_path(collection)]
+
+    def _get_stamp(self, collection: str):
+        return tuple(map(get_file_stamp, self._get_paths(collection)))
+
+    @abstractmethod
+    def _read(self, collection: str) -> Tuple[Dict[str, dict], int]:
+        """
+        Parse the files of a collection.
+        :return: (records, sequence counter)
+        """
+        raise NotImplementedError
+
+    def _load(self, collection: str) -> dict:
+        with self.lock:
+            cached = self._cache.get(collection)
+            if cached is not None and cached['writing']:
+                return cached
+            stamp = self._get_stamp(collection)
+            if cached is None or cached['stamp'] != stamp:
+                records, last_id = self._read(collection)
+                self.stats['file_reads'] += 1
+                # the counter can be missing or late if a file has been
+                # edited by hand, the highest ID found is then used as a floor
+                ids = [get_id_number(software_id) for software_id in records]
+                previous = cached or {'last_id': 0, 'version': 0}
+                cached = {'stamp': stamp,
+                          'records': records,
+                          'ordered_ids': None,
+                          'last_id': max([last_id, previous['last_id'], *ids]),
+                          'version': previous['version'] + 1,
+                          'writing': 0}
+                self._cache[collection] = cached
+            return cached
+
+    def records(self, collection: str) -> Dict[str, dict]:
+        return self._load(collection)['records']
+
+    def _get_ordered_ids(self, collection: str) -> List[str]:
+        # sorted once per parse and kept until a write adds an ID
+        with self.lock:
+            cached = self._load(collection)
+            if cached['ordered_ids'] is None:
+                cached['ordered_ids'] = sorted(cached['records'],
+                                               key=get_id_number)
+            return cached['ordered_ids']
+
+    def version(self, collection: str) -> int:
+        return self._load(collection)['version']
+
+    def get_modified_time(self, collection: str) -> Optional[int]:
+        times = [stamp[0] for stamp in self._get_stamp(collection)
+                 if stamp is not None]
+        return max(times) if times else None
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        cached = self._load(collection)
+        first_number = cached['last_id'] + 1
+        cached['last_id'] += count
+        return first_number
+
+    def get_last_id(self, collection: str) -> int:
+        return self._load(collection)['last_id']
+
+    def _start_write(self, collection: str, records: Dict[str, dict]):
+        """
+        Update the collection in memory and mark a write in progress, it
+        must be closed by _end_write().
+        """
+        with self.lock:
+            cached = self._load(collection)
+            if not cached['records'].keys() >= records.keys():
+                cached['ordered_ids'] = None
+            cached['records'].update(records)
+            ids = [get_id_number(software_id) for software_id in records]
+            cached['last_id'] = max([cached['last_id'], *ids])
+            cached['writing'] += 1
+            return cached
+
+    def _end_write(self, collection: str, cached: dict):
+        with self.lock:
+            cached['stamp'] = self._get_stamp(collection)
+            cached['writing'] -= 1
+
+    def write(self, collection: str, records: Dict[str, dict]):
+        self.prepare_write(collection, records)()
+
+    def _get_snapshot(self, collection: str, cached: dict) -> dict:
+        """
+        Copy of a collection in the format of data/<collection>.json, it
+        can be serialized while the collection is modified.
+        """
+        with self.lock:
+            return {collection: dict(cached['records']),
+                    'last_id': cached['last_id']}
+
+    def _sync(self, file):
+        """
+        Apply the durability policy to a file that has just been written,
+        it is flushed now or at the next commit().
+        """
+        if self.durability == 'write':
+            file.flush()
+            os.fsync(file.fileno())
+            self.stats['fsyncs'] += 1
+        elif self.durability == 'batch':
+            with self.lock:
+                self._unsynced_paths.add(file.name)
+
+    def commit(self):
+        if self.durability != 'batch':
+            return
+        with self.lock:
+            paths, self._unsynced_paths = self._unsynced_paths, set()
+        for path in paths:
+            if os.path.exists(path):
+                fsync_path(path)
+                self.stats['fsyncs'] += 1
+        if paths:
+            fsync_path(self.data_dir)
+
+    def _dump_snapshot(self, collection: str, data: dict,
+                       sync: bool = False):
+        """
+        Write a whole collection to data/<collection>.json, through a
+        temporary file replacing the previous one.
+        :param sync: flush the file to the disk now, whatever the policy
+        """
+        path = self.get_path(collection)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=4)
+            if sync or self.durability == 'write':
+                file.flush()
+                os.fsync(file.fileno())
+                self.stats['fsyncs'] += 1
+        os.replace(temporary_path, path)
+        if sync or self.durability == 'write':
+            fsync_path(self.data_dir)
+        elif self.durability == 'batch':
+            with self.lock:
+                self._unsynced_paths.add(path)
+        self.stats['file_writes'] += 1
+
+    def import_collection(self, collection: str, path: str):
+        # the whole collection is kept in memory anyway, and each write
+        # rewrites its file, so it is written at once
+        reader = RecordReader(path, collection)
+        records = dict(reader)
+        self._raise_last_id(collection, reader.values.get('last_id', 0))
+        self.write(collection, records)
+
+    def _read_snapshot(self, collection: str) -> Tuple[Dict[str, dict], int]:
+        try:
+            with open(self.get_path(collection), 'r',
+                      encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}, 0
+        return data[collection], data.get('last_id', 0)
+
+    def clear_cache(self):
+        self._cache.clear()
+
+
+class JsonStorage(_FileStorage):
+    """
+    Default storage engine, one JSON file per collection in the data
+    directory, rewritten as a whole on each write.
+    """
+    def _read(self, collection: str) -> Tuple[Dict[str, dict], int]:
+        return self._read_snapshot(collection)
+
+    def prepare_write(self, collection: str,
+                      records: Dict[str, dict]) -> Callable[[], None]:
+        cached = self._start_write(collection, records)
+        data = self._get_snapshot(collection, cached)
+
+        def persist():
+            try:
+                self._dump_snapshot(collection, data)
+            finally:
+                self._end_write(collection, cached)
+        return persist
+
+
+class JournalStorage(_FileStorage):
+    """
+    Append-only storage engine. Each write appends one JSON line per record
+    to data/<collection>.journal instead of rewriting the collection; the
+    snapshot data/<collection>.json keeps the format of JsonStorage.
+    Reads replay the journal over the snapshot, and the journal is folded
+    back into the snapshot once it is bigger than compact_threshold bytes.
+    """
+    JOURNAL_EXTENSION = 'journal'
+
+    def __init__(self, data_dir: str = DATA_DIR, durability: str = 'none',
+                 compact_threshold: int = 1024 * 1024):
+        super().__init__(data_dir, durability)
+        self.compact_threshold = compact_threshold
+
+    def get_journal_path(self, collection: str) -> str:
+        return self.get_path(collection, self.JOURNAL_EXTENSION)
+
+    def _get_paths(self, collection: str) -> List[str]:
+        return [self.get_path(collection),
+                self.get_journal_path(collection)]
+
+    def _read(self, collection: str) -> Tuple[Dict[str, dict], int]:
+        records, last_id = self._read_snapshot(collection)
+        try:
+            with open(self.get_journal_path(collection), 'r+b') as file:
+                end_of_entries = 0
+                for line in file:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError(line)
+                        entry = json.loads(line)
+                    except ValueError:
+                        # last line cut by a crash during an append, remove
+                        # it so that the next append starts on a new line
+                        file.truncate(end_of_entries)
+                        break
+                    records[entry['id']] = entry['record']
+                    last_id = max(last_id, entry['last_id'])
+                    end_of_entries += len(line)
+        except FileNotFoundError:
+            pass
+        return records, last_id
+
+    def prepare_write(self, collection: str,
+                      records: Dict[str, dict]) -> Callable[[], None]:
+        cached = self._start_write(collection, records)
+        last_id = cached['last_id']
+
+        def persist():
+            try:
+                lines = [json.dumps({'id': software_id,
+                                     'record': record,
+                                     'last_id': last_id}) + '\n'
+                         for software_id, record in records.items()]
+                with open(self.get_journal_path(collection), 'a',
+                          encoding='utf-8') as file:
+                    file.writelines(lines)
+                    self._sync(file)
+                self.stats['file_writes'] += 1
+            finally:
+                self._end_write(collection, cached)
+            if cached['stamp'][1][1] > self.compact_threshold:
+                self.compact(collection)
+        return persist
+
+    def compact(self, collection: str):
+        """
+        Fold the journal of a collection into its snapshot and empty it.
+        If the application stops between both steps, the journal is replayed
+        over the new snapshot, which gives the same records. Unless the
+        policy is 'none', the snapshot is on the disk before the journal is
+        emptied.
+        """
+        cached = self._start_write(collection, {})
+        try:
+            self._dump_snapshot(collection,
+                                self._get_snapshot(collection, cached),
+                                sync=self.durability != 'none')
+            with open(self.get_journal_path(collection), 'w',
+                      encoding='utf-8'):
+                pass
+        finally:
+            self._end_write(collection, cached)
+
+
+class MemoryStorage(Storage):
+    """
+    Storage engine keeping every collection in memory, nothing is written
+    on the disk. Used to run benchmarks, simulations and tests without any
+    I/O cost, it can be seeded with the JSON files of a data directory.
+    """
+    def __init__(self):
+        super().__init__()
+        self._collections: Dict[str, Dict[str, dict]] = {}
+        self._last_ids: Dict[str, int] = {}
+
+    @classmethod
+    def from_directory(cls, data_dir: str = DATA_DIR) -> 'MemoryStorage':
+        instance = cls()
+        for file_name in sorted(os.listdir(data_dir)):
+            collection, extension = os.path.splitext(file_name)
+            if extension == '.json':
+                instance.import_collection(
+                    collection, os.path.join(data_dir, file_name))
+        return instance
+
+    def records(self, collection: str) -> Dict[str, dict]:
+        return self._collections.setdefault(collection, {})
+
+    def version(self, collection: str) -> int:
+        return 0
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        first_number = self._last_ids.get(collection, 0) + 1
+        self._last_ids[collection] = first_number + count - 1
+        return first_number
+
+    def get_last_id(self, collection: str) -> int:
+        return self._last_ids.get(collection, 0)
+
+    def write(self, collection: str, records: Dict[str, dict]):
+        self.records(collection).update(records)
+        ids = [get_id_number(software_id) for software_id in records]
+        self._last_ids[collection] = max([self._last_ids.get(collection, 0),
+                                          *ids])
+
+    def clear_cache(self):
+        # the memory is the storage itself, nothing can be reloaded
+        pass
+
+
+STORAGE_ENGINES = ('json', 'journal', 'sqlite', 'memory')
+
+
+def create_storage(engine: str = 'json', data_dir: str = DATA_DIR,
+                   durability: Optional[str] = None) -> Storage:
+    """
+    Create a storage engine from its name, JSON files being the default.
+    :param engine: one of STORAGE_ENGINES
+    :param data_dir: directory of the data files, the memory engine is
+    seeded with its JSON files.
+    :param durability: one of DURABILITY_POLICIES, None for the default of
+    the engine, ignored by the memory engine
+    """
+    options = {} if durability is None else {'durability': durability}
+    if engine == 'json':
+        return JsonStorage(data_dir, **options)
+    if engine == 'journal':
+        return JournalStorage(data_dir, **options)
+    if engine == 'memory':
+        return MemoryStorage.from_directory(data_dir)
+    if engine == 'sqlite':
+        from models.storage_sqlite import SqliteStorage
+        return SqliteStorage(data_dir, **options)
+    raise ValueError(f"Unknown storage engine: {engine}")
@@ -0,0 +1,238 @@
+import atexit
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from models.storage import Storage, get_id_number
+
+
+class BackgroundStorage(Storage):
+    """
+    Wrapper around a storage engine that persists the writes in a worker
+    thread, so the interface never waits for the disk.
+    A write only updates the memory (see Storage.prepare_write) and puts the
+    persisting job in a bounded queue; when the queue is full, the next
+    write waits for the worker. Records waiting in the queue stay visible
+    to the reads.
+    flush() is a barrier, it returns once every queued write is persisted.
+    The records of a failed write are kept and written again with the next
+    write of their collection, or by flush().
+    """
+    # job number of the queued records whose write failed
+    FAILED_JOB = 0
+
+    def __init__(self, storage: Storage, max_queue: int = 64):
+        super().__init__()
+        self.storage = storage
+        self.stats = storage.stats
+        self.stats.update({'queued_writes': 0, 'write_errors': 0})
+        self.last_flush_latency: Optional[float] = None
+        self.last_write_duration: Optional[float] = None
+        self.last_error: Optional[Exception] = None
+        self._queue = queue.Queue(max_queue)
+        self._queued: Dict[str, Dict[str, Tuple[int, dict]]] = {}
+        self._job_number = 0
+        self._put_lock = threading.Lock()
+        self._queued_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="background-storage")
+        self._thread.start()
+        atexit.register(self.close)
+
+    def get_status(self) -> Dict[str, Optional[float]]:
+        """
+        :return: number of jobs waiting in the queue, time in seconds
+        between the queuing and the end of the last job, and time spent by
+        the worker on the last job.
+        """
+        return {'queue_depth': self._queue.qsize(),
+                'last_flush_latency': self.last_flush_latency,
+                'last_write_duration': self.last_write_duration}
+
+    def _run(self):
+        """ Loop of the worker thread, persist the jobs in queue order. """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            job_number, collection, persist, queued_at = job
+            if collection is None:
+                # commit of the writes queued before it
+                persist = self.storage.commit
+            started_at = time.perf_counter()
+            failed = False
+            try:
+                persist()
+            except Exception as error:
+                self.stats['write_errors'] += 1
+                self.last_error = error
+                failed = True
+            finally:
+                # the records of a failed job are kept, written again with
+                # the next write of their collection or by flush()
+                with self._queued_lock:
+                    queued = self._queued.get(collection, {})
+                    for software_id, (number, record) in list(queued.items()):
+                        if number != job_number:
+                            continue
+                        if failed:
+                            queued[software_id] = (self.FAILED_JOB, record)
+                        else:
+                            del queued[software_id]
+                done_at = time.perf_counter()
+                self.last_write_duration = done_at - started_at
+                self.last_flush_latency = done_at - queued_at
+                self._queue.task_done()
+
+    def write(self, collection: str, records: Dict[str, dict]):
+        if self._closed:
+            with self.storage.lock:
+                self.storage.write(collection, records)
+            return
+        with self._put_lock:
+            with self._queued_lock:
+                failed = {software_id: record for software_id, (number, record)
+                          in self._queued.get(collection, {}).items()
+                          if number == self.FAILED_JOB}
+            records = {**failed, **records}
+            with self.storage.lock:
+                persist = self.storage.prepare_write(collection, records)
+            self._job_number += 1
+            with self._queued_lock:
+                queued = self._queued.setdefault(collection, {})
+                for software_id, record in records.items():
+                    queued[software_id] = (self._job_number, record)
+            self.stats['queued_writes'] += 1
+            self._queue.put((self._job_number, collection, persist,
+                             time.perf_counter()))
+
+    def commit(self):
+        if self._closed:
+            with self.storage.lock:
+                self.storage.commit()
+            return
+        with self._put_lock:
+            self._queue.put((None, None, None, time.perf_counter()))
+
+    def _retry_failed(self) -> bool:
+        """
+        Queue the records of the failed jobs again, followed by a commit.
+        :return: False if there was nothing to retry
+        """
+        with self._queued_lock:
+            collections = [collection for collection, queued
+                           in self._queued.items()
+                           if any(number == self.FAILED_JOB
+                                  for number, _ in queued.values())]
+        for collection in collections:
+            self.write(collection, {})
+        if collections:
+            self.commit()
+        return bool(collections)
+
+    def flush(self):
+        """
+        Barrier, wait until every queued write is persisted, the failed
+        writes are tried once more.
+        An error of the worker since the last barrier is raised here.
+        """
+        self._queue.join()
+        if self.last_error is not None and self._retry_failed():
+            # only an error of the retry is raised
+            self.last_error = None
+            self._queue.join()
+        with self.storage.lock:
+            self.storage.flush()
+        if self.last_error is not None:
+            error, self.last_error = self.last_error, None
+            raise error
+
+    def close(self):
+        """ Persist the queued writes and stop the worker thread. """
+        if self._closed:
+            return
+        self._queue.join()
+        self._retry_failed()
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def records(self, collection: str) -> Dict[str, dict]:
+        with self.storage.lock:
+            records = self.storage.records(collection)
+        with self._queued_lock:
+            queued = self._queued.get(collection)
+            if not queued:
+                return records
+            return {**records, **{software_id: record for software_id,
+                                  (_, record) in queued.items()}}
+
+    def get(self, collection: str, software_id: str) -> Optional[dict]:
+        with self._queued_lock:
+            queued = self._queued.get(collection, {})
+            if software_id in queued:
+                return queued[software_id][1]
+        with self.storage.lock:
+            return self.storage.get(collection, software_id)
+
+    def get_many(self, collection: str,
+                 software_ids: Iterable[str]) -> Dict[str, dict]:
+        software_ids = list(software_ids)
+        with self._queued_lock:
+            queued = self._queued.get(collection, {})
+            records = {software_id: queued[software_id][1]
+                       for software_id in software_ids
+                       if software_id in queued}
+        with self.storage.lock:
+            stored = self.storage.get_many(
+                collection, [software_id for software_id in software_ids
+                             if software_id not in records])
+        return {**stored, **records}
+
+    def scan(self, collection: str, offset: int = 0,
+             limit: Optional[int] = None,
+             where: Optional[Callable[[str, dict], bool]] = None
+             ) -> Iterator[Tuple[str, dict]]:
+        with self._queued_lock:
+            queued = bool(self._queued.get(collection))
+        if queued:
+            # queued records are merged by records()
+            return iter(list(super().scan(collection, offset, limit, where)))
+        with self.storage.lock:
+            return iter(list(self.storage.scan(collection, offset, limit,
+                                               where)))
+
+    def count(self, collection: str) -> int:
+        with self._queued_lock:
+            queued = bool(self._queued.get(collection))
+        if queued:
+            return len(self.records(collection))
+        with self.storage.lock:
+            return self.storage.count(collection)
+
+    def version(self, collection: str) -> int:
+        with self.storage.lock:
+            return self.storage.version(collection)
+
+    def get_modified_time(self, collection: str) -> Optional[int]:
+        with self.storage.lock:
+            return self.storage.get_modified_time(collection)
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        with self.storage.lock:
+            return self.storage.allocate_ids(collection, count)
+
+    def get_last_id(self, collection: str) -> int:
+        with self._queued_lock:
+            queued = list(self._queued.get(collection, {}))
+        with self.storage.lock:
+            last_id = self.storage.get_last_id(collection)
+        return max([last_id, *map(get_id_number, queued)])
+
+    def clear_cache(self):
+        self.flush()
+        with self.storage.lock:
+            self.storage.clear_cache()
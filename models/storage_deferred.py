@@ -0,0 +1,196 @@
+import atexit
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from models.storage import Storage, get_id_number
+
+
+class DeferredStorage(Storage):
+    """
+    Wrapper around a storage engine that delays and coalesces the writes.
+    Written records are kept in memory, where they are visible to reads,
+    and flushed to the wrapped engine by a timer thread once no write has
+    happened for `debounce` seconds. A flush is never later than
+    `max_delay` seconds after the first unflushed write, so a crash can't
+    lose more than the last `max_delay` seconds of changes.
+    Pending writes are also flushed by flush(), when the application exits
+    and before the cache is cleared.
+    A failed flush is tried again `max_delay` seconds later, the records
+    are kept and the error is raised by the next write(), flush() or
+    close() unless a flush succeeded since.
+    """
+    def __init__(self, storage: Storage, max_delay: float = 2.0,
+                 debounce: float = 0.2):
+        super().__init__()
+        self.storage = storage
+        self.max_delay = max_delay
+        self.debounce = min(debounce, max_delay)
+        self.stats = storage.stats
+        self.stats.update({'deferred_writes': 0, 'coalesced_writes': 0,
+                           'flushes': 0})
+        self._pending: Dict[str, Dict[str, dict]] = {}
+        self._first_write: Optional[float] = None
+        self._last_write: Optional[float] = None
+        self._retry_at: Optional[float] = None
+        self.last_error: Optional[Exception] = None
+        self._closed = False
+        self._condition = threading.Condition(threading.RLock())
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="deferred-storage")
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _get_flush_time(self) -> float:
+        flush_time = min(self._last_write + self.debounce,
+                         self._first_write + self.max_delay)
+        if self._retry_at is not None:
+            flush_time = max(flush_time, self._retry_at)
+        return flush_time
+
+    def _run(self):
+        """ Loop of the timer thread, flush when the flush time is over. """
+        with self._condition:
+            while not self._closed:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                timeout = self._get_flush_time() - time.monotonic()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+                try:
+                    self._flush_pending()
+                except Exception as error:
+                    # keep the records and try again after max_delay
+                    self.stats['flush_errors'] = \
+                        self.stats.get('flush_errors', 0) + 1
+                    self.last_error = error
+                    self._retry_at = time.monotonic() + self.max_delay
+
+    def _flush_pending(self):
+        """ Write and commit the pending records, kept if it fails. """
+        if not self._pending:
+            return
+        for collection, records in self._pending.items():
+            self.storage.write(collection, records)
+        self.storage.commit()
+        self._pending.clear()
+        self.stats['flushes'] += 1
+        self._first_write = self._last_write = None
+        self._retry_at = None
+        self.last_error = None
+
+    def _raise_last_error(self):
+        """ Raise the error of a flush of the timer thread once. """
+        if self.last_error is not None:
+            error, self.last_error = self.last_error, None
+            raise error
+
+    def flush(self):
+        """
+        Write every pending record to the wrapped storage engine, and flush
+        the wrapped engine too.
+        """
+        with self._condition:
+            self._flush_pending()
+            self.storage.flush()
+            self._raise_last_error()
+
+    def close(self):
+        """ Flush the pending records and stop the timer thread. """
+        with self._condition:
+            try:
+                self._flush_pending()
+                self._raise_last_error()
+            finally:
+                self._closed = True
+                self._condition.notify()
+                atexit.unregister(self.close)
+
+    def write(self, collection: str, records: Dict[str, dict]):
+        with self._condition:
+            if self._closed:
+                self.storage.write(collection, records)
+                return
+            # the records are not taken, the caller saves them again
+            self._raise_last_error()
+            # the collections are flushed in the order of their last write,
+            # derived records are written after the records they come from
+            pending = self._pending.pop(collection, {})
+            self._pending[collection] = pending
+            self.stats['deferred_writes'] += len(records)
+            self.stats['coalesced_writes'] += len(pending.keys() & records)
+            pending.update(records)
+            self._last_write = time.monotonic()
+            if self._first_write is None:
+                self._first_write = self._last_write
+            self._condition.notify()
+
+    def records(self, collection: str) -> Dict[str, dict]:
+        with self._condition:
+            records = self.storage.records(collection)
+            pending = self._pending.get(collection)
+            if not pending:
+                return records
+            return {**records, **pending}
+
+    def get(self, collection: str, software_id: str) -> Optional[dict]:
+        with self._condition:
+            pending = self._pending.get(collection, {})
+            if software_id in pending:
+                return pending[software_id]
+            return self.storage.get(collection, software_id)
+
+    def get_many(self, collection: str,
+                 software_ids: Iterable[str]) -> Dict[str, dict]:
+        with self._condition:
+            pending = self._pending.get(collection, {})
+            software_ids = list(software_ids)
+            records = self.storage.get_many(
+                collection, [software_id for software_id in software_ids
+                             if software_id not in pending])
+            records.update({software_id: pending[software_id]
+                            for software_id in software_ids
+                            if software_id in pending})
+            return records
+
+    def scan(self, collection: str, offset: int = 0,
+             limit: Optional[int] = None,
+             where: Optional[Callable[[str, dict], bool]] = None
+             ) -> Iterator[Tuple[str, dict]]:
+        with self._condition:
+            if self._pending.get(collection):
+                # pending records are merged by records()
+                return iter(list(super().scan(collection, offset, limit,
+                                              where)))
+            return iter(list(self.storage.scan(collection, offset, limit,
+                                               where)))
+
+    def count(self, collection: str) -> int:
+        with self._condition:
+            if self._pending.get(collection):
+                return len(self.records(collection))
+            return self.storage.count(collection)
+
+    def version(self, collection: str) -> int:
+        with self._condition:
+            return self.storage.version(collection)
+
+    def get_modified_time(self, collection: str) -> Optional[int]:
+        with self._condition:
+            return self.storage.get_modified_time(collection)
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        with self._condition:
+            return self.storage.allocate_ids(collection, count)
+
+    def get_last_id(self, collection: str) -> int:
+        with self._condition:
+            pending = self._pending.get(collection, {})
+            return max([self.storage.get_last_id(collection),
+                        *map(get_id_number, pending)])
+
+    def clear_cache(self):
+        with self._condition:
+            self._flush_pending()
+            self.storage.clear_cache()
@@ -0,0 +1,449 @@
+import argparse
+import json
+import os.path
+import sqlite3
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from models.storage import Storage, DATA_DIR, get_id_number
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sequences (
+    collection TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    last_name TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    date_of_birth TEXT NOT NULL,
+    chess_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_chess_id ON players (chess_id);
+CREATE INDEX IF NOT EXISTS players_name ON players (last_name, first_name);
+CREATE TABLE IF NOT EXISTS tournaments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    place TEXT NOT NULL,
+    date_start TEXT NOT NULL,
+    date_end TEXT NOT NULL,
+    description TEXT NOT NULL,
+    rounds_number INTEGER NOT NULL,
+    first_pairing TEXT,
+    complete INTEGER NOT NULL,
+    pairing_memory TEXT,
+    pairing_method TEXT NOT NULL DEFAULT 'circle'
+);
+CREATE INDEX IF NOT EXISTS tournaments_date_start
+    ON tournaments (date_start);
+CREATE TABLE IF NOT EXISTS tournament_participants (
+    tournament_id INTEGER NOT NULL REFERENCES tournaments (id),
+    position INTEGER NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    score REAL NOT NULL,
+    PRIMARY KEY (tournament_id, position)
+);
+CREATE INDEX IF NOT EXISTS tournament_participants_player
+    ON tournament_participants (player_id);
+CREATE TABLE IF NOT EXISTS tournament_rounds (
+    tournament_id INTEGER NOT NULL REFERENCES tournaments (id),
+    position INTEGER NOT NULL,
+    round_name TEXT NOT NULL,
+    round_id INTEGER REFERENCES rounds (id),
+    PRIMARY KEY (tournament_id, position)
+);
+CREATE INDEX IF NOT EXISTS tournament_rounds_round
+    ON tournament_rounds (round_id);
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    time_start TEXT,
+    time_end TEXT,
+    complete INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS round_matches (
+    round_id INTEGER NOT NULL REFERENCES rounds (id),
+    position INTEGER NOT NULL,
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    PRIMARY KEY (round_id, position)
+);
+CREATE INDEX IF NOT EXISTS round_matches_match ON round_matches (match_id);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    player_1 INTEGER NOT NULL REFERENCES players (id),
+    score_1 REAL NOT NULL,
+    player_2 INTEGER NOT NULL REFERENCES players (id),
+    score_2 REAL NOT NULL,
+    complete INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS matches_player_1 ON matches (player_1);
+CREATE INDEX IF NOT EXISTS matches_player_2 ON matches (player_2);
+CREATE TABLE IF NOT EXISTS records (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+"""
+
+
+class SqliteStorage(Storage):
+    """
+    Storage engine using a SQLite database in WAL mode, with one table per
+    model and indexes on the software IDs and on the players references.
+    Records keep the format of the JSON files, they are converted to and
+    from rows by the _read_<collection> and _write_<collection> methods.
+    Collections without a table are stored as JSON in the records table.
+    """
+    DATABASE_NAME = 'chess.sqlite3'
+    # below the limit of parameters of a query in old SQLite versions
+    MAX_SELECTED_IDS = 500
+    TABLES = {'players': 'p', 'tournaments': 't', 'rounds': 'r',
+              'matches': 'm'}
+    # in WAL mode, NORMAL only syncs the log at the checkpoints, and FULL
+    # syncs it at the end of every transaction
+    SYNCHRONOUS = {'none': 'OFF', 'batch': 'NORMAL', 'write': 'FULL'}
+
+    def __init__(self, data_dir: str = DATA_DIR,
+                 database_name: str = DATABASE_NAME,
+                 durability: str = 'batch'):
+        super().__init__()
+        if durability not in self.SYNCHRONOUS:
+            raise ValueError(f"Unknown durability policy: {durability}")
+        self.path = os.path.join(data_dir, database_name)
+        # the connection can be used by the thread of a DeferredStorage,
+        # which serializes every call
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute(
+            f"PRAGMA synchronous = {self.SYNCHRONOUS[durability]}")
+        self.connection.execute("PRAGMA foreign_keys = OFF")
+        self.connection.executescript(SCHEMA)
+        self._upgrade_schema()
+        self.connection.commit()
+
+    def _upgrade_schema(self):
+        """ Add the columns missing from a database created before them. """
+        columns = [row[1] for row in self.connection.execute(
+            "PRAGMA table_info(tournaments)")]
+        if 'pairing_memory' not in columns:
+            self.connection.execute(
+                "ALTER TABLE tournaments ADD COLUMN pairing_memory TEXT")
+        if 'pairing_method' not in columns:
+            self.connection.execute(
+                "ALTER TABLE tournaments ADD COLUMN pairing_method TEXT"
+                " NOT NULL DEFAULT 'circle'")
+
+    def _to_software_id(self, collection: str, number: int) -> str:
+        return f"{self.TABLES[collection]}_{number}"
+
+    def _select(self, collection: str, ids: Optional[List[str]] = None):
+        """
+        Read records from the database, every record of the collection if
+        ids is None.
+        :return: {'<software_id>': {...}}
+        """
+        self.stats['file_reads'] += 1
+        if collection not in self.TABLES:
+            query = "SELECT id, data FROM records WHERE collection = ?"
+            parameters = (collection,)
+            if ids is not None:
+                query += f" AND id IN ({', '.join('?' * len(ids))})"
+                parameters += tuple(ids)
+            rows = self.connection.execute(query, parameters).fetchall()
+            return {software_id: json.loads(data)
+                    for software_id, data in rows}
+        numbers = None if ids is None else [get_id_number(software_id)
+                                            for software_id in ids]
+        reader = getattr(self, f"_read_{collection}")
+        return {self._to_software_id(collection, number): record
+                for number, record in reader(numbers)}
+
+    def _where_ids(self, column: str, numbers: Optional[List[int]]):
+        if numbers is None:
+            return "", ()
+        placeholders = ", ".join("?" * len(numbers))
+        return f" WHERE {column} IN ({placeholders})", tuple(numbers)
+
+    def _read_players(self, numbers):
+        where, parameters = self._where_ids("id", numbers)
+        query = ("SELECT id, last_name, first_name, date_of_birth, chess_id"
+                 f" FROM players{where} ORDER BY id")
+        for row in self.connection.execute(query, parameters):
+            yield row[0], {"last_name": row[1],
+                           "first_name": row[2],
+                           "date_of_birth": row[3],
+                           "chess_id": row[4]}
+
+    def _write_players(self, rows):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO players (id, last_name, first_name,"
+            " date_of_birth, chess_id) VALUES (?, ?, ?, ?, ?)",
+            [(number, record["last_name"], record["first_name"],
+              record["date_of_birth"], record["chess_id"])
+             for number, record in rows])
+
+    def _read_matches(self, numbers):
+        where, parameters = self._where_ids("id", numbers)
+        query = ("SELECT id, player_1, score_1, player_2, score_2, complete"
+                 f" FROM matches{where} ORDER BY id")
+        for row in self.connection.execute(query, parameters):
+            yield row[0], {f"p_{row[1]}": row[2],
+                           f"p_{row[3]}": row[4],
+                           "complete": bool(row[5])}
+
+    def _write_matches(self, rows):
+        values = []
+        for number, record in rows:
+            scores = [(get_id_number(player_id), score) for player_id, score
+                      in record.items() if player_id != "complete"]
+            values.append((number, *scores[0], *scores[1],
+                           record["complete"]))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO matches (id, player_1, score_1, player_2,"
+            " score_2, complete) VALUES (?, ?, ?, ?, ?, ?)", values)
+
+    def _read_rounds(self, numbers):
+        where, parameters = self._where_ids("round_id", numbers)
+        matches = {}
+        for round_id, match_id in self.connection.execute(
+                "SELECT round_id, match_id FROM round_matches"
+                f"{where} ORDER BY round_id, position", parameters):
+            matches.setdefault(round_id, []).append(f"m_{match_id}")
+        where, parameters = self._where_ids("id", numbers)
+        query = ("SELECT id, name, time_start, time_end, complete"
+                 f" FROM rounds{where} ORDER BY id")
+        for row in self.connection.execute(query, parameters):
+            yield row[0], {"name": row[1],
+                           "time_start": row[2],
+                           "time_end": row[3],
+                           "complete": bool(row[4]),
+                           "matches": matches.get(row[0], [])}
+
+    def _write_rounds(self, rows):
+        rows = list(rows)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO rounds (id, name, time_start, time_end,"
+            " complete) VALUES (?, ?, ?, ?, ?)",
+            [(number, record["name"], record["time_start"],
+              record["time_end"], record["complete"])
+             for number, record in rows])
+        self.connection.executemany(
+            "DELETE FROM round_matches WHERE round_id = ?",
+            [(number,) for number, _ in rows])
+        self.connection.executemany(
+            "INSERT INTO round_matches (round_id, position, match_id)"
+            " VALUES (?, ?, ?)",
+            [(number, position, get_id_number(match_id))
+             for number, record in rows
+             for position, match_id in enumerate(record["matches"])])
+
+    def _read_tournaments(self, numbers):
+        where, parameters = self._where_ids("tournament_id", numbers)
+        participants = {}
+        for tournament_id, player_id, score in self.connection.execute(
+                "SELECT tournament_id, player_id, score"
+                f" FROM tournament_participants{where}"
+                " ORDER BY tournament_id, position", parameters):
+            participants.setdefault(tournament_id, {})[f"p_{player_id}"] = \
+                score
+        rounds = {}
+        for tournament_id, round_name, round_id in self.connection.execute(
+                "SELECT tournament_id, round_name, round_id"
+                f" FROM tournament_rounds{where}"
+                " ORDER BY tournament_id, position", parameters):
+            rounds.setdefault(tournament_id, {})[round_name] = (
+                f"r_{round_id}" if round_id is not None else None)
+        where, parameters = self._where_ids("id", numbers)
+        query = ("SELECT id, name, place, date_start, date_end, description,"
+                 " rounds_number, first_pairing, complete, pairing_memory,"
+                 f" pairing_method FROM tournaments{where} ORDER BY id")
+        for row in self.connection.execute(query, parameters):
+            yield row[0], {"name": row[1],
+                           "place": row[2],
+                           "date_start": row[3],
+                           "date_end": row[4],
+                           "description": row[5],
+                           "participants": participants.get(row[0], {}),
+                           "rounds_number": row[6],
+                           "rounds": rounds.get(row[0], {}),
+                           "first_pairing": json.loads(row[7]),
+                           "complete": bool(row[8]),
+                           "pairing_memory": json.loads(row[9] or 'null'),
+                           "pairing_method": row[10]}
+
+    def _write_tournaments(self, rows):
+        rows = list(rows)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO tournaments (id, name, place, date_start,"
+            " date_end, description, rounds_number, first_pairing, complete,"
+            " pairing_memory, pairing_method)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(number, record["name"], record["place"], record["date_start"],
+              record["date_end"], record["description"],
+              record["rounds_number"], json.dumps(record["first_pairing"]),
+              record["complete"],
+              json.dumps(record.get("pairing_memory")),
+              record.get("pairing_method", "circle"))
+             for number, record in rows])
+        numbers = [(number,) for number, _ in rows]
+        self.connection.executemany(
+            "DELETE FROM tournament_participants WHERE tournament_id = ?",
+            numbers)
+        self.connection.executemany(
+            "INSERT INTO tournament_participants (tournament_id, position,"
+            " player_id, score) VALUES (?, ?, ?, ?)",
+            [(number, position, get_id_number(player_id), score)
+             for number, record in rows
+             for position, (player_id, score)
+             in enumerate(record["participants"].items())])
+        self.connection.executemany(
+            "DELETE FROM tournament_rounds WHERE tournament_id = ?", numbers)
+        self.connection.executemany(
+            "INSERT INTO tournament_rounds (tournament_id, position,"
+            " round_name, round_id) VALUES (?, ?, ?, ?)",
+            [(number, position, round_name,
+              get_id_number(round_id) if round_id else None)
+             for number, record in rows
+             for position, (round_name, round_id)
+             in enumerate(record["rounds"].items())])
+
+    def records(self, collection: str) -> Dict[str, dict]:
+        return self._select(collection)
+
+    def get(self, collection: str, software_id: str) -> Optional[dict]:
+        return self._select(collection, [software_id]).get(software_id)
+
+    def get_many(self, collection: str,
+                 software_ids: Iterable[str]) -> Dict[str, dict]:
+        software_ids = list(dict.fromkeys(software_ids))
+        records = {}
+        for start in range(0, len(software_ids), self.MAX_SELECTED_IDS):
+            records.update(self._select(
+                collection,
+                software_ids[start:start + self.MAX_SELECTED_IDS]))
+        return records
+
+    def scan(self, collection: str, offset: int = 0,
+             limit: Optional[int] = None,
+             where: Optional[Callable[[str, dict], bool]] = None
+             ) -> Iterator[Tuple[str, dict]]:
+        if collection not in self.TABLES:
+            yield from super().scan(collection, offset, limit, where)
+            return
+        query = f"SELECT id FROM {collection} ORDER BY id"
+        parameters = ()
+        if where is None:
+            # the page is selected by the database
+            query += " LIMIT ? OFFSET ?"
+            parameters = (-1 if limit is None else limit, offset)
+        numbers = [row[0] for row in
+                   self.connection.execute(query, parameters)]
+        # otherwise the records are read and filtered one chunk at a time
+        skipped = returned = 0
+        for start in range(0, len(numbers), self.MAX_SELECTED_IDS):
+            records = self._select(collection, [
+                self._to_software_id(collection, number)
+                for number in numbers[start:start + self.MAX_SELECTED_IDS]])
+            for software_id, record in records.items():
+                if where is not None:
+                    if not where(software_id, record):
+                        continue
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    if limit is not None and returned >= limit:
+                        return
+                    returned += 1
+                yield software_id, record
+
+    def count(self, collection: str) -> int:
+        if collection in self.TABLES:
+            query = f"SELECT COUNT(*) FROM {collection}"
+            return self.connection.execute(query).fetchone()[0]
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM records WHERE collection = ?",
+            (collection,)).fetchone()[0]
+
+    def version(self, collection: str) -> int:
+        # changes only when another connection commits to the database
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_last_id(self, collection: str) -> int:
+        row = self.connection.execute(
+            "SELECT last_id FROM sequences WHERE collection = ?",
+            (collection,)).fetchone()
+        if row is not None:
+            return row[0]
+        if collection in self.TABLES:
+            return self.connection.execute(
+                f"SELECT COALESCE(MAX(id), 0) FROM {collection}").fetchone()[0]
+        ids = self._select(collection).keys()
+        return max([get_id_number(software_id) for software_id in ids],
+                   default=0)
+
+    def _set_last_id(self, collection: str, last_id: int):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sequences (collection, last_id)"
+            " VALUES (?, ?)", (collection, last_id))
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        with self.connection:
+            first_number = self.get_last_id(collection) + 1
+            self._set_last_id(collection, first_number + count - 1)
+        return first_number
+
+    def write(self, collection: str, records: Dict[str, dict]):
+        with self.connection:
+            if collection in self.TABLES:
+                rows = [(get_id_number(software_id), record)
+                        for software_id, record in records.items()]
+                getattr(self, f"_write_{collection}")(rows)
+            else:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO records (collection, id, data)"
+                    " VALUES (?, ?, ?)",
+                    [(collection, software_id, json.dumps(record))
+                     for software_id, record in records.items()])
+            ids = [get_id_number(software_id) for software_id in records]
+            last_id = self.get_last_id(collection)
+            if max(ids, default=0) > last_id:
+                self._set_last_id(collection, max(ids))
+        self.stats['file_writes'] += 1
+
+    def close(self):
+        self.connection.close()
+
+
+def migrate(data_dir: str = DATA_DIR,
+            database_name: str = SqliteStorage.DATABASE_NAME):
+    """
+    Copy the JSON files of a data directory into a SQLite database, in the
+    same directory.
+    :return: {'<collection>': <number_of_records>}
+    """
+    storage = SqliteStorage(data_dir, database_name)
+    counts = {}
+    try:
+        for collection in SqliteStorage.TABLES:
+            path = os.path.join(data_dir, f"{collection}.json")
+            if not os.path.exists(path):
+                continue
+            storage.import_collection(collection, path)
+            counts[collection] = storage.count(collection)
+    finally:
+        storage.close()
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Copy the JSON files of the data directory into a SQLite"
+                    " database.")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--database', default=SqliteStorage.DATABASE_NAME,
+                        help="name of the database file in the data"
+                             " directory")
+    arguments = parser.parse_args()
+    for name, count in migrate(arguments.data_dir,
+                               arguments.database).items():
+        print(f"{name}: {count} records")
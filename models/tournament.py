@@ -1,11 +1,18 @@
 from models.base_model import _BaseModel
 from models.round import Round
+from models.match import Match
 from models.pairing import Pairing
 from models.player import Player
-from typing import Optional, Dict
+from models.software_id import SoftwareId
+from typing import Callable, Optional, Dict
 
 
 class Tournament(_BaseModel):
+    # collection of the summaries of the tournaments, see get_summaries()
+    SUMMARIES = 'tournament_summaries'
+    # (storage, time of the last write of the tournaments) of the last check
+    _summaries_checked = None
+
     def __init__(self,
                  name: str,
                  place: str,
@@ -14,7 +21,9 @@ class Tournament(_BaseModel):
                  description: str = "",
                  rounds_number: int = 4,
                  complete: bool = False,
-                 save_to_db: bool = True):
+                 pairing_method: str = Pairing.CIRCLE,
+                 save_to_db: bool = True,
+                 software_id: Optional[str] = None):
         """
         Initialize a new Tournament instance
         :param name:
@@ -24,9 +33,14 @@ class Tournament(_BaseModel):
         :param description:
         :param rounds_number: rounds_number should not be greater than
         <number_of_players - 1>
+        :param pairing_method: pairing of the rounds after the first one,
+        one of Pairing.METHODS
         :param save_to_db: if true, save the instance in the database
+        :param software_id: ID loaded from the database or reserved
         """
-        super().__init__()
+        super().__init__(software_id)
+        if pairing_method not in Pairing.METHODS:
+            raise ValueError(f"Unknown pairing method {pairing_method!r}")
         self.name = name
         self.place = place
         self.date_start = date_start
@@ -34,23 +48,46 @@ class Tournament(_BaseModel):
         self.description = description
         self.participants = {}
         self.rounds_number = rounds_number
+        self.pairing_method = pairing_method
         self.rounds = {}
+        # round ID -> Round and key of the current round, see _index_rounds()
+        self._rounds_by_id = {}
+        self._current_round: Optional[str] = None
         self.initialize_rounds_dict()
-        self.pairing = None
+        self._pairing = None
         self._first_pairing_memory = None
+        # played pairs saved by Pairing.get_memory(), until the pairing is
+        # instantiated
+        self._pairing_memory = None
         self.complete = complete
         if save_to_db:
             self.save_to_database()
 
+    @property
+    def pairing(self) -> Optional[Pairing]:
+        """
+        Pairing of the tournament, rebuilt from the played matches on first
+        access once a round has been created.
+        """
+        if self._pairing is None and self._first_pairing_memory and any(
+                round_item is not None for round_item in self.rounds.values()):
+            self._pairing = self._instantiate_pairing()
+        return self._pairing
+
+    @pairing.setter
+    def pairing(self, pairing: Optional[Pairing]):
+        self._pairing = pairing
+
     @staticmethod
     def _instantiate_players(dict_participants: Dict[str, float]):
         """
-        Dictionary comprehension to instantiate Players from their
-        corresponding ID
+        Dictionary comprehension to reference Players from their
+        corresponding ID, each Player is read on first access.
         :param dict_participants: {"p_1": 4, "p_2": 3}
         :return: {"p_1": (<Obj.player>, 4), "p_2": (<Obj.player>, 3)}
         """
-        return {participant_id: (Player.from_json(participant_id), score)
+        return {SoftwareId.parse(participant_id):
+                (Player.lazy(participant_id), score)
                 for participant_id, score in dict_participants.items()}
 
     @classmethod
@@ -71,46 +108,62 @@ class Tournament(_BaseModel):
                        description=item_data["description"],
                        rounds_number=item_data["rounds_number"],
                        complete=item_data["complete"],
-                       save_to_db=False)
-        instance.software_id = tournament_id
-        instance._first_pairing_memory = item_data["first_pairing"]
+                       pairing_method=item_data.get("pairing_method",
+                                                    Pairing.CIRCLE),
+                       save_to_db=False,
+                       software_id=tournament_id)
+        if item_data["first_pairing"]:
+            instance._first_pairing_memory = tuple(
+                SoftwareId.parse(player_id)
+                for player_id in item_data["first_pairing"])
+        instance._pairing_memory = item_data.get("pairing_memory")
         return instance
 
     @staticmethod
     def _instantiate_rounds(rounds_data: dict[str, Optional[str]]):
         """
-        Create instances of Round objects from the provided data.
+        Reference Round objects from the provided data, each Round is read
+        on first access.
         :param rounds_data: {"Round_1" : "r_5", "Round_2" : "r_10"}
-        :return: ({"Round_1" : <Obj.Round>, "Round_2" : <Obj.Round>}, Boolean)
-        """
-        rounds = {}
-        round_exist = False
-        round_name_list = []
-        for round_name, round_id in rounds_data.items():
-            if round_id:
-                rounds[round_name] = Round.from_json(round_id)
-                round_exist = True
-                round_name_list.append(round_name)
-            else:
-                rounds[round_name] = None
-        return rounds, round_exist
-
-    def _instantiate_pairing(self, item_data):
+        :return: {"Round_1" : <Obj.Round>, "Round_2" : <Obj.Round>}
+        """
+        return {round_name: Round.lazy(round_id) if round_id else None
+                for round_name, round_id in rounds_data.items()}
+
+    def _hydrate_current_round(self):
+        """
+        Read the last created round and its matches, the round shown when a
+        tournament is opened. The other rounds are read on first access.
+        """
+        created_rounds = [round_item for round_item in self.rounds.values()
+                          if round_item is not None]
+        if created_rounds:
+            created_rounds[-1].load_matches()
+
+    def _instantiate_pairing(self):
         """
         Instantiate the Pairing object based on the participants and
         previous match data. This method uses the participants and the
-        matches that have already been played to instantiate a pairing
-        object.
-        :param item_data: Dictionary containing the data from the
-        JSON file. :return: <Obj.Pairing> initialized with the provided data
-        """
-        list_played_matches = []
-        for round_item in self.rounds.values():
-            if round_item:
-                list_played_matches.extend([tuple(sorted(match.score.keys()))
-                                            for match in round_item.matches])
-        return Pairing.instantiate_pairing(item_data["participants"].keys(),
-                                           item_data["first_pairing"],
+        played pairs saved with the tournament, or the matches that have
+        already been played if they weren't saved (older tournaments).
+        :return: <Obj.Pairing> initialized with the data of the tournament
+        """
+        if self._pairing_memory is not None:
+            pairing = Pairing.instantiate_pairing(self.participants.keys(),
+                                                  self._first_pairing_memory,
+                                                  [])
+            pairing.restore_memory(self._pairing_memory)
+            return pairing
+        rounds = Round.from_json_many(
+            round_item.software_id for round_item in self.rounds.values()
+            if round_item is not None)
+        matches = Match.from_json_many(
+            match_id for round_item in rounds
+            for match_id in round_item.get_match_ids())
+        list_played_matches = [tuple(sorted(match.score.keys()))
+                               for match in matches]
+        return Pairing.instantiate_pairing(self.participants.keys(),
+                                           self._first_pairing_memory,
                                            list_played_matches)
 
     @classmethod
@@ -120,10 +173,10 @@ class Tournament(_BaseModel):
                                    save_to_db: bool = False):
         """
         Create a tournament object from a json dictionary
-        Instantiate Players from their corresponding id found in the database
-        Instantiate Rounds from their corresponding id found in the database
-        Instantiate Pairing from the "first_pairing" found in database and
-        Rounds founds in self.rounds
+        Players and Rounds are referenced by their id and read from the
+        database on first access, except the current round.
+        Pairing is instantiated from the "first_pairing" found in database
+        and Rounds founds in self.rounds when it is first needed.
         :param item_data: The dictionary extracted from the tournament.json
         :param tournament_id:
         :param save_to_db: must be false to avoid copy of tournament instance
@@ -132,19 +185,15 @@ class Tournament(_BaseModel):
         """
         instance = cls._initialize_instance(item_data, tournament_id)
 
-        # dict comprehension to create instances of Players and score
+        # dict comprehension to reference Players and score
         instance.participants = instance._instantiate_players(
             item_data["participants"])
 
         # if value stored in "Round_x": value isn't null, then it will
-        # instantiate the Round with the corresponding ID
-        instance.rounds, round_exist = instance._instantiate_rounds(
-            item_data["rounds"])
-
-        # if at least, one round has already been created, then instantiate
-        # the corresponding Pairing
-        if round_exist:
-            instance.pairing = instance._instantiate_pairing(item_data)
+        # reference the Round with the corresponding ID
+        instance.rounds = instance._instantiate_rounds(item_data["rounds"])
+        instance._index_rounds()
+        instance._hydrate_current_round()
 
         return instance
 
@@ -154,12 +203,13 @@ class Tournament(_BaseModel):
         :return: dictionary with data to save in the database
         """
         # Get rid of instances of players when storing datas
-        data_participants = {participant_id: participant[1]
+        data_participants = {str(participant_id): participant[1]
                              for participant_id, participant
                              in self.participants.items()}
 
         # Get rid of instances of rounds when storing datas
-        data_rounds = {round_name: round_id.software_id if round_id else None
+        data_rounds = {round_name:
+                       str(round_id.software_id) if round_id else None
                        for round_name, round_id in self.rounds.items()}
 
         return {
@@ -171,21 +221,145 @@ class Tournament(_BaseModel):
             "participants": data_participants,
             "rounds_number": self.rounds_number,
             "rounds": data_rounds,
-            "first_pairing": self._first_pairing_memory,
-            "complete": self.complete
+            "first_pairing": ([str(player_id) for player_id
+                               in self._first_pairing_memory]
+                              if self._first_pairing_memory else None),
+            "complete": self.complete,
+            "pairing_method": self.pairing_method,
+            "pairing_memory": (self._pairing.get_memory()
+                               if self._pairing is not None
+                               else self._pairing_memory)
         }
 
+    @staticmethod
+    def _summarize(record: dict) -> dict:
+        """ Summary of a tournament record, displayed in the tables. """
+        return {"name": record["name"],
+                "place": record["place"],
+                "date_start": record["date_start"],
+                "date_end": record["date_end"],
+                "participants": len(record["participants"]),
+                "rounds": record["rounds_number"],
+                "complete": record["complete"]}
+
+    @classmethod
+    def _get_derived_records(cls, records):
+        """
+        Write the summaries of the saved tournaments after them, even when
+        they didn't change, so the summaries stay newer than the tournaments,
+        see _check_summaries().
+        """
+        return {cls.SUMMARIES: {software_id: cls._summarize(record)
+                                for software_id, record in records.items()}}
+
+    @classmethod
+    def _check_summaries(cls) -> int:
+        """
+        Build the summaries from the tournaments when the collection is
+        empty (data saved by a previous version) or older than the
+        tournaments (edited by hand). The check only reads the time of the
+        last writes, it is done again when the tournaments are written.
+        :return: number of summaries
+        """
+        storage = cls.get_storage()
+        modified = storage.get_modified_time(cls.class_name_plural())
+        if cls._summaries_checked != (storage, modified):
+            summaries_modified = storage.get_modified_time(cls.SUMMARIES)
+            if (not storage.count(cls.SUMMARIES)
+                    or modified is not None
+                    and (summaries_modified is None
+                         or modified > summaries_modified)):
+                summaries = {software_id: cls._summarize(record)
+                             for software_id, record in storage.records(
+                                 cls.class_name_plural()).items()}
+                if summaries:
+                    storage.write(cls.SUMMARIES, summaries)
+                    storage.commit()
+            cls._summaries_checked = (storage, modified)
+        return storage.count(cls.SUMMARIES)
+
+    @classmethod
+    def count_summaries(cls) -> int:
+        return cls._check_summaries()
+
+    @classmethod
+    def get_summaries(cls, offset: int = 0, limit: Optional[int] = None,
+                      where: Optional[Callable[[str, dict], bool]] = None
+                      ) -> Dict[str, dict]:
+        """
+        Return a copy of the summaries of the tournaments, in the order of
+        their IDs, read without parsing the tournaments.
+        :param offset: number of matching summaries skipped
+        :param limit: maximum number of summaries, all of them if None
+        :param where: filter called with the software ID and the summary
+        :return: {'<software_id>': {'name': ..., 'participants': 8, ...}}
+        """
+        cls._check_summaries()
+        return {software_id: dict(summary) for software_id, summary
+                in cls.get_storage().scan(cls.SUMMARIES, offset, limit,
+                                          where)}
+
+    @classmethod
+    def get_summaries_of(cls, software_ids) -> Dict[str, dict]:
+        """
+        Return a copy of the summaries of several tournaments, read at once.
+        :return: {'<software_id>': {...}}, without the IDs that don't exist
+        """
+        cls._check_summaries()
+        summaries = cls.get_storage().get_many(
+            cls.SUMMARIES, [str(software_id) for software_id in software_ids])
+        return {software_id: dict(summary)
+                for software_id, summary in summaries.items()}
+
     def initialize_rounds_dict(self) -> Dict[str, None]:
         """
         Initialize the rounds dictionary with keys 'Round_1', 'Round_2'
         """
         self.rounds = {f"Round_{i+1}": None for i in range(self.rounds_number)}
+        self._index_rounds()
+
+    def _index_rounds(self):
+        """
+        Index the rounds by ID and forget the current round, computed again
+        on the next call to check_current_round().
+        """
+        self._rounds_by_id = {round_item.software_id: round_item
+                              for round_item in self.rounds.values()
+                              if round_item is not None}
+        self._current_round = None
+
+    def _set_round(self, round_key: str, round_item: Round):
+        """ Add a created round to self.rounds and to the indexes. """
+        self.rounds[round_key] = round_item
+        self._rounds_by_id[round_item.software_id] = round_item
+        self._current_round = None
+
+    def get_round(self, round_id: str) -> Optional[Round]:
+        """
+        Get a Round of the tournament from its ID
+        :param round_id: 'r_<number>'
+        :return: Round object, None if the round isn't in the tournament
+        """
+        return self._rounds_by_id.get(round_id)
+
+    def get_current_match(self, player_id: str) -> Optional[Match]:
+        """
+        Get the Match of a player in the current round
+        :param player_id: 'p_<number>'
+        :return: Match object, None if the current round isn't created or
+        the player has no match
+        """
+        current_round = self.rounds.get(self.check_current_round())
+        if current_round is None:
+            return None
+        return current_round.get_match_by_player_id(player_id)
 
     def add_participant(self, player_id: str):
         """
         Add a participant to the tournament and set his/her score to 0
         """
         try:
+            player_id = SoftwareId.parse(player_id)
             if player_id not in self.participants.keys():
                 self.participants[player_id] = (Player.from_json(player_id),
                                                 0.0)
@@ -198,14 +372,17 @@ class Tournament(_BaseModel):
         Initialize the first round of the tournament by generating pairings
         and creating rounds and matches.
         """
-        self.pairing = Pairing(sorted(self.participants.keys()))
+        # sorted as text, as before the IDs were typed, so that the random
+        # first configuration of a seed doesn't change
+        self.pairing = Pairing(sorted(self.participants.keys(), key=str))
         # save the first configuration to allow recreation the same
         # configuration circle in Pairing.
         self._first_pairing_memory = self.pairing.initial_configuration
         self.pairing.generate_circle_configurations()
         match_pairs = self.pairing.generate_first_round_configuration()
-        self.rounds["Round_1"] = Round("Round_1", match_pairs)
-        self.save_to_database()
+        with self.batch():
+            self._set_round("Round_1", Round("Round_1", match_pairs))
+            self.save_to_database()
 
     def _update_participants_scores(self, matches):
         """
@@ -234,21 +411,32 @@ class Tournament(_BaseModel):
         current_round = self.check_current_round()
         if round_key == current_round and self.rounds[round_key] is not None:
             try:
-                self.rounds[round_key].end_round()
-                self._update_participants_scores(
-                    self.rounds[round_key].matches)
-                if self._are_all_rounds_complete():
-                    self.complete = True
-                self.save_to_database()
+                with self.batch():
+                    self.rounds[round_key].end_round()
+                    self._current_round = None
+                    self._update_participants_scores(
+                        self.rounds[round_key].matches)
+                    if self._are_all_rounds_complete():
+                        self.complete = True
+                    self.save_to_database()
+                # results of a finished round must not be lost
+                self.flush()
 
             except ValueError as ve:
                 raise ve
 
     def check_current_round(self):
         """
-        Check and return the current round of the tournament.
+        Check and return the current round of the tournament, kept until a
+        round is created or completed.
         :return: ex : 'Round_2'
         """
+        if self._current_round is None:
+            self._current_round = self._find_current_round()
+        return self._current_round
+
+    def _find_current_round(self):
+        """ First round not finished, or the round after the last one. """
         for key, round_item in self.rounds.items():
             if round_item and not round_item.is_finished:
                 return key
@@ -259,7 +447,7 @@ class Tournament(_BaseModel):
             new_round_number = int(list_of_round[-1].split("_")[-1]) + 1
             return f"Round_{new_round_number}"
 
-    def create_next_round(self):
+    def create_next_round(self, time_budget: Optional[float] = None):
         """
         Start the next round of the tournament by generating pairings based on
         the current ranking.
@@ -269,6 +457,8 @@ class Tournament(_BaseModel):
             1 - Try to match the players with the highest scores on against
             the others.
             2 - Avoid the repetition of a past match.
+        :param time_budget: seconds given to the 'search' pairing method,
+        its statistics are kept in self.pairing.search_stats
         """
         try:
             current_round = self.check_current_round()
@@ -277,10 +467,12 @@ class Tournament(_BaseModel):
 
             ranking = self.get_ranking()
             next_pairing = self.pairing.generate_next_round_from_ranking(
-                ranking)
-            self.rounds[current_round] = Round(name=current_round,
-                                               matches_pairs=next_pairing)
-            self.save_to_database()
+                ranking, self.pairing_method, time_budget)
+            with self.batch():
+                self._set_round(current_round,
+                                Round(name=current_round,
+                                      matches_pairs=next_pairing))
+                self.save_to_database()
 
         except KeyError as ke:
             raise ke
@@ -291,8 +483,9 @@ class Tournament(_BaseModel):
             current_round = self.check_current_round()
             if self.rounds[current_round].time_start is not None:
                 raise ValueError
-            self.rounds[current_round].start_round()
-            self.save_to_database()
+            with self.batch():
+                self.rounds[current_round].start_round()
+                self.save_to_database()
 
         except KeyError as ke:
             raise ke
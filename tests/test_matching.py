@@ -0,0 +1,102 @@
+import random
+import unittest
+from models.matching import max_weight_matching
+
+
+def brute_force_matching(vertex_count, edges, max_cardinality):
+    """
+    Best matching of a small graph, by trying every matching.
+    :return: (cardinality, weight), the cardinality comes first with
+    max_cardinality, else only the weight counts
+    """
+    edges_of = {}
+    for i, j, weight in edges:
+        edges_of.setdefault(min(i, j), []).append((max(i, j), weight))
+
+    def get_key(result):
+        return result if max_cardinality else result[1]
+
+    def search(v, used):
+        if v == vertex_count:
+            return 0, 0
+        best = search(v + 1, used)
+        if not used >> v & 1:
+            for u, weight in edges_of.get(v, []):
+                if not used >> u & 1:
+                    count, total = search(v + 1, used | 1 << u)
+                    if get_key((count + 1, total + weight)) > get_key(best):
+                        best = count + 1, total + weight
+        return best
+
+    return search(0, 0)
+
+
+def random_graph(generator):
+    vertex_count = generator.randint(1, 9)
+    density = generator.random()
+    edges = [(i, j, generator.randint(1, 10))
+             for i in range(vertex_count) for j in range(i + 1, vertex_count)
+             if generator.random() < density]
+    return vertex_count, edges
+
+
+def get_result(matching, edges):
+    weights = {(i, j): weight for i, j, weight in edges}
+    pairs = [(i, j) for i, j in enumerate(matching.mates) if j > i]
+    return len(pairs), sum(weights[pair] for pair in pairs)
+
+
+class TestMaxWeightMatching(unittest.TestCase):
+    def test_same_weight_as_brute_force(self):
+        generator = random.Random(1)
+        for _ in range(300):
+            vertex_count, edges = random_graph(generator)
+            for warm_start in (False, True):
+                matching = max_weight_matching(edges, warm_start=warm_start,
+                                               vertex_count=vertex_count)
+                _, weight = get_result(matching, edges)
+                self.assertEqual(weight, brute_force_matching(
+                    vertex_count, edges, False)[1], edges)
+
+    def test_max_cardinality_as_brute_force(self):
+        generator = random.Random(2)
+        for _ in range(300):
+            vertex_count, edges = random_graph(generator)
+            matching = max_weight_matching(edges, max_cardinality=True,
+                                           vertex_count=vertex_count)
+            self.assertEqual(get_result(matching, edges),
+                             brute_force_matching(vertex_count, edges, True),
+                             edges)
+
+    def test_reduced_costs(self):
+        generator = random.Random(3)
+        for _ in range(300):
+            vertex_count, edges = random_graph(generator)
+            matching = max_weight_matching(edges, vertex_count=vertex_count)
+            for i, j, weight in edges:
+                cost = matching.reduced_cost(i, j, weight)
+                self.assertGreaterEqual(cost, 0, edges)
+                if matching.mates[i] == j:
+                    self.assertEqual(cost, 0, edges)
+
+    def test_is_maximum_of_a_subgraph(self):
+        generator = random.Random(4)
+        for _ in range(300):
+            vertex_count, edges = random_graph(generator)
+            pairs = {(i, j) for i, j, _ in edges}
+            subgraph = [edge for edge in edges if generator.random() < 0.6]
+            matching = max_weight_matching(subgraph, max_cardinality=True,
+                                           vertex_count=vertex_count)
+            if matching.is_maximum(lambda i, j: (i, j) not in pairs):
+                self.assertEqual(
+                    get_result(matching, subgraph)[0],
+                    brute_force_matching(vertex_count, edges, True)[0],
+                    edges)
+            full = max_weight_matching(edges, max_cardinality=True,
+                                       vertex_count=vertex_count)
+            self.assertTrue(full.is_maximum(
+                lambda i, j: (i, j) not in pairs), edges)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from models.storage import JournalStorage, JsonStorage, MemoryStorage
+from models.storage_background import BackgroundStorage
+from models.storage_sqlite import SqliteStorage, migrate
+
+PLAYERS = {'p_1': {'first_name': 'Ada', 'last_name': 'Lovelace',
+                   'date_of_birth': '1815-12-10', 'chess_id': 'AB12345'},
+           'p_3': {'first_name': 'Alan', 'last_name': 'Turing',
+                   'date_of_birth': '1912-06-23', 'chess_id': 'CD67890'}}
+
+
+class TestImportCollection(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.data_dir = directory.name
+        storage = MemoryStorage()
+        storage.write('players', PLAYERS)
+        storage.allocate_ids('players', 37)
+        self.path = os.path.join(self.data_dir, 'players.json')
+        storage.export_collection('players', self.path)
+
+    def check_storage(self, storage):
+        self.assertEqual(storage.records('players'), PLAYERS)
+        self.assertEqual(storage.get_last_id('players'), 40)
+        self.assertEqual(storage.allocate_ids('players'), 41)
+
+    def test_file_engines(self):
+        for engine in (JsonStorage, JournalStorage):
+            with tempfile.TemporaryDirectory() as data_dir:
+                engine(data_dir).import_collection('players', self.path)
+                self.check_storage(engine(data_dir))
+
+    def test_memory_from_directory(self):
+        self.check_storage(MemoryStorage.from_directory(self.data_dir))
+
+    def test_migrate(self):
+        self.assertEqual(migrate(self.data_dir), {'players': 2})
+        storage = SqliteStorage(self.data_dir)
+        self.addCleanup(storage.close)
+        self.check_storage(storage)
+
+    def test_counter_behind_the_storage(self):
+        storage = MemoryStorage()
+        storage.allocate_ids('players', 50)
+        storage.import_collection('players', self.path)
+        self.assertEqual(storage.get_last_id('players'), 50)
+
+
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = SqliteStorage(directory.name)
+        self.addCleanup(self.storage.close)
+        self.notes = {f'n_{number}': {'text': str(number)}
+                      for number in range(1, 8)}
+        self.storage.write('notes', self.notes)
+        self.storage.write('drafts', {'n_1': {'text': 'draft'}})
+
+    def test_get_many_without_table(self):
+        self.storage.MAX_SELECTED_IDS = 2
+        software_ids = ['n_7', 'n_2', 'n_9', 'n_4', 'n_2', 'n_1']
+        self.assertEqual(
+            self.storage.get_many('notes', software_ids),
+            {software_id: self.notes[software_id]
+             for software_id in ('n_7', 'n_2', 'n_4', 'n_1')})
+        self.assertEqual(self.storage.get('notes', 'n_9'), None)
+        self.assertEqual(self.storage.get('drafts', 'n_1'),
+                         {'text': 'draft'})
+
+    def test_scan_without_table(self):
+        self.assertEqual(self.storage.records('notes'), self.notes)
+        self.assertEqual(dict(self.storage.scan('notes', 2, 3)),
+                         {software_id: self.notes[software_id]
+                          for software_id in ('n_3', 'n_4', 'n_5')})
+        self.assertEqual(self.storage.count('notes'), 7)
+
+
+class FailingStorage(MemoryStorage):
+    """ Memory storage whose next writes fail. """
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def write(self, collection, records):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        super().write(collection, records)
+
+
+class TestBackgroundStorage(unittest.TestCase):
+    def test_failed_write_is_retried_by_flush(self):
+        engine = FailingStorage(1)
+        storage = BackgroundStorage(engine)
+        self.addCleanup(storage.close)
+        storage.write('players', PLAYERS)
+        storage.flush()
+        self.assertEqual(engine.records('players'), PLAYERS)
+        self.assertEqual(storage.stats['write_errors'], 1)
+
+    def test_failed_write_is_retried_by_next_write(self):
+        engine = FailingStorage(1)
+        storage = BackgroundStorage(engine)
+        self.addCleanup(storage.close)
+        storage.write('players', {'p_1': PLAYERS['p_1']})
+        storage._queue.join()
+        self.assertEqual(storage.get('players', 'p_1'), PLAYERS['p_1'])
+        storage.write('players', {'p_3': PLAYERS['p_3']})
+        storage._queue.join()
+        self.assertEqual(engine.records('players'), PLAYERS)
+
+    def test_error_of_the_retry_is_raised(self):
+        storage = BackgroundStorage(FailingStorage(2))
+        self.addCleanup(storage.close)
+        storage.write('players', PLAYERS)
+        with self.assertRaises(OSError):
+            storage.flush()
+        self.assertEqual(storage.get('players', 'p_3'), PLAYERS['p_3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,7 +25,7 @@ class ViewTableBase(ABC):
     def __init__(self, stdscr, pad_height):
         """
         Initializes the table view with the given terminal screen and pad
-        height (lines of datas).
+        height (lines of datas of a page).
         """
         self.stdscr = stdscr
         self.pad_height = pad_height
@@ -63,6 +63,9 @@ class ViewTableBase(ABC):
 
         # Attributes used in the main menu
         self.pad_line = 0
+        self.pad_rows = 0
+        self.has_previous_page = False
+        self.has_next_page = False
         self.TABLE_KEY_ACTION = {
             curses.KEY_DOWN: self.move_down,
             curses.KEY_UP: self.move_up,
@@ -252,15 +255,32 @@ class ViewTableBase(ABC):
                 if result:
                     return result
 
+    def set_pages(self, has_previous_page, has_next_page):
+        """ Tell the view if pages exist before and after the shown one. """
+        self.has_previous_page = has_previous_page
+        self.has_next_page = has_next_page
+
     def move_up(self):
-        """ Scroll the content pad up one line. """
+        """
+        Scroll the content pad up one line, or ask for the previous page,
+        shown from its end, at the top of the pad.
+        """
         if self.pad_line > 0:
             self.pad_line -= 1
+        elif self.has_previous_page:
+            self.pad_line = max(0, self.pad_height - self.content_height)
+            return 'PAGE', -1
 
     def move_down(self):
-        """ Scroll the content pad down one line. """
-        if self.pad_line < self.pad_height - self.content_height:
+        """
+        Scroll the content pad down one line, or ask for the next page at
+        the bottom of the pad.
+        """
+        if self.pad_line < self.pad_rows - self.content_height:
             self.pad_line += 1
+        elif self.has_next_page:
+            self.pad_line = 0
+            return 'PAGE', 1
 
     @staticmethod
     def quit():
@@ -302,6 +322,7 @@ class ViewTableBase(ABC):
 
     def fill_pad(self, sorted_content):
         """ Fills the content pad with sorted content rows. """
+        self.pad_rows = len(sorted_content)
         self.content_pad.clear()
         for i, data in enumerate(sorted_content):
             line = self.create_content(data)